@@ -6,25 +6,154 @@ Creates 100K+ records with various property types, locations, and features.
 """
 
 import json
+import multiprocessing
+import os
 import random
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-from typing import Dict, List, Tuple
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
 import logging
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Amenity vocabulary; stored as one has_<feature> column each plus a features_packed
+# bitmask (bit i set when PROPERTY_FEATURES[i] is present)
+PROPERTY_FEATURES = [
+    "central_air", "hardwood_floors", "garage", "pool", "garden",
+    "balcony", "fireplace", "basement", "attic", "patio",
+    "gym", "spa", "theater_room", "wine_cellar", "smart_home",
+    "solar_panels", "elevator", "concierge", "doorman", "in_unit_laundry"
+]
+
+# Image URLs are not stored per record; rebuild them with expand_images()
+IMAGE_URL_TEMPLATE = "https://images.gogidix.com/properties/{pid}/image_{i}.jpg"
+
+def expand_images(df: pd.DataFrame) -> pd.Series:
+    """Reconstruct the list of image URLs for each property from ``num_images``."""
+    return pd.Series(
+        [
+            [IMAGE_URL_TEMPLATE.format(pid=pid, i=i + 1) for i in range(count)]
+            for pid, count in zip(df["id"], df["num_images"])
+        ],
+        index=df.index,
+        name="images"
+    )
+
+def expand_features(df: pd.DataFrame) -> pd.Series:
+    """Reconstruct the list of feature names for each property from ``features_packed``."""
+    bits = (df["features_packed"].to_numpy()[:, None] >> np.arange(len(PROPERTY_FEATURES), dtype=np.uint32)) & 1
+    names = np.array(PROPERTY_FEATURES)
+    return pd.Series([names[row.astype(bool)].tolist() for row in bits], index=df.index, name="features")
+
+def _pick(rng: np.random.Generator, options: List[str], n: int) -> pd.Series:
+    """Draw ``n`` values uniformly from ``options`` as a string Series."""
+    return pd.Series(np.asarray(options)[rng.choice(len(options), size=n)])
+
+def _compute_prices_numpy(base_price, square_feet, year_built, bedrooms, bathrooms, jitter):
+    """Apply the age/bedroom/bathroom premiums and return (price_per_sqft, price)."""
+    price_per_sqft = base_price / square_feet
+    price_per_sqft *= np.where(year_built > 2010, 1.1, 1.0)
+    price_per_sqft *= np.where(bedrooms >= 4, 1.15, 1.0)
+    price_per_sqft *= np.where(bathrooms >= 3, 1.1, 1.0)
+    return price_per_sqft, square_feet * price_per_sqft * jitter
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _compute_prices(base_price, square_feet, year_built, bedrooms, bathrooms, jitter):
+        """Fused single-pass version of _compute_prices_numpy."""
+        n = base_price.shape[0]
+        price_per_sqft = np.empty(n)
+        price = np.empty(n)
+        for i in prange(n):
+            pps = base_price[i] / square_feet[i]
+            if year_built[i] > 2010:
+                pps *= 1.1
+            if bedrooms[i] >= 4:
+                pps *= 1.15
+            if bathrooms[i] >= 3:
+                pps *= 1.1
+            price_per_sqft[i] = pps
+            price[i] = square_feet[i] * pps * jitter[i]
+        return price_per_sqft, price
+else:
+    _compute_prices = _compute_prices_numpy
+
+def _json_default(obj):
+    """Serialize values orjson does not handle natively."""
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def _generate_chunk(generator: "PropertyDataGenerator", n: int, seed: np.random.SeedSequence) -> pd.DataFrame:
+    """Generate one chunk of records in a worker process."""
+    return generator._generate_batch(n, np.random.default_rng(seed))
+
 class PropertyDataGenerator:
     """Generates synthetic real estate property data."""
 
-    def __init__(self, num_records: int = 100000):
+    def __init__(self, num_records: int = 100000, seed: Optional[int] = None):
         self.num_records = num_records
+        self.seed = seed
         self.cities = self._load_cities()
         self.property_types = ["apartment", "house", "condo", "townhouse", "villa", "studio"]
         self.neighborhoods = self._generate_neighborhoods()
+        self.rng = np.random.default_rng(seed)
+        self._sample_source: Optional[pd.DataFrame] = None
+        self._sample: Optional[pd.DataFrame] = None
+        self._build_lookup_tables()
+
+    def _build_lookup_tables(self):
+        """Cache per-type and per-city lookup tables as arrays for batch indexing."""
+        # Indexed by position in self.property_types
+        self._property_type_name = np.asarray(self.property_types)
+        self._base_price = np.array([350000, 500000, 400000, 450000, 800000, 250000])
+        self._bedrooms_low = np.array([1, 2, 1, 2, 3, 0])
+        self._bedrooms_high = np.array([4, 6, 3, 5, 8, 0])
+        self._sqft_low = np.array([600, 1200, 800, 1000, 2000, 300])
+        self._sqft_high = np.array([3000, 6000, 3500, 4000, 10000, 800])
+        self._has_lot = np.array([False, True, False, False, True, False])
+        # Villas get more features; apartments and condos fewer
+        self._features_low = np.array([3, 4, 3, 4, 8, 4])
+        self._features_high = np.array([8, 10, 8, 10, 15, 10])
+        self._feature_name = np.array(PROPERTY_FEATURES)
+
+        # Indexed by position in self.cities
+        self._city_name = np.array([c["name"] for c in self.cities])
+        self._city_state = np.array([c["state"] for c in self.cities])
+        self._city_multiplier = np.array([c["price_multiplier"] for c in self.cities])
+        self._city_lat = np.array([c["coordinates"][0] for c in self.cities])
+        self._city_lon = np.array([c["coordinates"][1] for c in self.cities])
+        self._states = np.array(sorted(set(self._city_state)))
+        self._city_state_code = np.searchsorted(self._states, self._city_state).astype(np.int8)
+
+        # Neighborhood codes for all cities in one flat array; city i owns
+        # _neighborhood_flat[_neighborhood_offsets[i]:_neighborhood_offsets[i] + _neighborhood_counts[i]]
+        self._neighborhood_name = np.array(sorted({name for names in self.neighborhoods.values() for name in names}))
+        city_neighborhoods = [self.neighborhoods[c["name"]] for c in self.cities]
+        self._neighborhood_flat = np.searchsorted(
+            self._neighborhood_name, [name for names in city_neighborhoods for name in names]
+        ).astype(np.int16)
+        self._neighborhood_counts = np.array([len(names) for names in city_neighborhoods])
+        self._neighborhood_offsets = np.concatenate(([0], np.cumsum(self._neighborhood_counts)[:-1]))
 
     def _load_cities(self) -> List[Dict]:
         """Load major cities with real price multipliers."""
@@ -43,6 +172,7 @@ class PropertyDataGenerator:
 
     def _generate_neighborhoods(self) -> Dict[str, List[str]]:
         """Generate neighborhood names for each city."""
+        rng = random.Random(self.seed)
         neighborhoods = {}
         for city in self.cities:
             # Generate realistic neighborhood names
@@ -50,13 +180,13 @@ class PropertyDataGenerator:
             suffixes = ["Side", "Hills", "Heights", "Valley", "Park", "Grove", "Bay", "Village"]
 
             city_neighborhoods = []
-            for _ in range(random.randint(10, 20)):
-                if random.random() < 0.3:
+            for _ in range(rng.randint(10, 20)):
+                if rng.random() < 0.3:
                     # Use actual neighborhood name patterns
-                    name = random.choice(["Greenwich", "SoHo", "TriBeCa", "Beverly", "Malibu", "Santa Monica"])
+                    name = rng.choice(["Greenwich", "SoHo", "TriBeCa", "Beverly", "Malibu", "Santa Monica"])
                 else:
-                    prefix = random.choice(prefixes)
-                    suffix = random.choice(suffixes)
+                    prefix = rng.choice(prefixes)
+                    suffix = rng.choice(suffixes)
                     name = f"{prefix} {suffix}"
                 city_neighborhoods.append(name)
 
@@ -64,256 +194,287 @@ class PropertyDataGenerator:
 
         return neighborhoods
 
-    def _generate_base_price(self, property_type: str, city: Dict) -> float:
-        """Generate base price based on property type and city."""
-        base_prices = {
-            "apartment": 350000,
-            "house": 500000,
-            "condo": 400000,
-            "townhouse": 450000,
-            "villa": 800000,
-            "studio": 250000
-        }
+    def _generate_batch(self, n: int, rng: Optional[np.random.Generator] = None) -> pd.DataFrame:
+        """Generate ``n`` property records as columnar arrays."""
+        rng = rng if rng is not None else self.rng
 
-        base = base_prices[property_type] * city["price_multiplier"]
+        property_type_idx = rng.integers(0, len(self.property_types), n)
+        city_idx = rng.integers(0, len(self.cities), n)
+
+        # Draw all continuous noise for the batch up front
+        price_noise = 1.0 + 0.2 * rng.standard_normal(n)
+        lat_offset, lon_offset = 0.05 * rng.standard_normal((2, n))  # approximately 10km radius
+        price_jitter = rng.uniform(0.9, 1.1, n)
+        lot_ratio = rng.uniform(1, 5, n)
+
+        # Generate property details
+        bedrooms = rng.integers(
+            self._bedrooms_low[property_type_idx], self._bedrooms_high[property_type_idx] + 1
+        ).astype(np.int8)
+        bathrooms = np.maximum(1, bedrooms + rng.choice([-1, 0, 1], size=n, p=[0.25, 0.5, 0.25])).astype(np.int8)
+        square_feet = rng.integers(
+            self._sqft_low[property_type_idx], self._sqft_high[property_type_idx] + 1
+        ).astype(np.int32)
+        year_built = rng.integers(1950, 2024, n, dtype=np.int16)
+        lot_size = np.where(self._has_lot[property_type_idx], square_feet * lot_ratio, np.nan)
+
+        # Generate coordinates near the city center
+        latitude = self._city_lat[city_idx] + lat_offset
+        longitude = self._city_lon[city_idx] + lon_offset
+
+        # Generate pricing, with premiums for newer properties and more bedrooms/bathrooms
+        base_price = self._base_price[property_type_idx] * self._city_multiplier[city_idx] * price_noise
+        price_per_sqft, price = _compute_prices(
+            base_price, square_feet, year_built, bedrooms, bathrooms, price_jitter
+        )
 
-        # Add random variation
-        variation = random.gauss(1.0, 0.2)
-        return base * variation
+        # Generate location details
+        local_idx = (rng.random(n) * self._neighborhood_counts[city_idx]).astype(np.int64)
+        neighborhood_code = self._neighborhood_flat[self._neighborhood_offsets[city_idx] + local_idx]
 
-    def _generate_address(self, city: Dict) -> str:
-        """Generate a realistic address."""
-        street_numbers = list(range(100, 9999, 2))
         street_names = [
             "Main St", "Oak Ave", "Elm St", "Maple Dr", "Cedar Ln",
             "Park Ave", "5th Ave", "Broadway", "Washington St", "Market St",
             "Church St", "State St", "Franklin Ave", "Madison Ave", "Lexington Ave"
         ]
-
-        number = random.choice(street_numbers)
-        street = random.choice(street_names)
-        neighborhood = random.choice(self.neighborhoods[city["name"]])
-
-        return f"{number} {street}, {neighborhood}, {city['name']}, {city['state']}"
-
-    def _generate_coordinates(self, city: Dict, address: str) -> Tuple[float, float]:
-        """Generate coordinates near the city center."""
-        lat_center, lon_center = city["coordinates"]
-
-        # Add random offset (approximately 10km radius)
-        lat_offset = random.gauss(0, 0.05)
-        lon_offset = random.gauss(0, 0.05)
-
-        return lat_center + lat_offset, lon_center + lon_offset
-
-    def _generate_features(self, property_type: str) -> List[str]:
-        """Generate property features based on type."""
-        all_features = [
-            "central_air", "hardwood_floors", "garage", "pool", "garden",
-            "balcony", "fireplace", "basement", "attic", "patio",
-            "gym", "spa", "theater_room", "wine_cellar", "smart_home",
-            "solar_panels", "elevator", "concierge", "doorman", "in_unit_laundry"
-        ]
-
-        # Select features based on property type
-        if property_type == "villa":
-            # More features for luxury properties
-            num_features = random.randint(8, 15)
-        elif property_type in ["apartment", "condo"]:
-            num_features = random.randint(3, 8)
-        else:
-            num_features = random.randint(4, 10)
-
-        return random.sample(all_features, min(num_features, len(all_features)))
-
-    def _generate_images_urls(self, property_id: str) -> List[str]:
-        """Generate fake image URLs for a property."""
-        num_images = random.randint(5, 20)
-        return [
-            f"https://images.gogidix.com/properties/{property_id}/image_{i+1}.jpg"
-            for i in range(num_images)
-        ]
-
-    def generate_property_record(self) -> Dict:
-        """Generate a single property record."""
-        property_type = random.choice(self.property_types)
-        city = random.choice(self.cities)
-
-        # Generate property details
-        bedrooms = {
-            "studio": 0,
-            "apartment": random.randint(1, 4),
-            "condo": random.randint(1, 3),
-            "house": random.randint(2, 6),
-            "townhouse": random.randint(2, 5),
-            "villa": random.randint(3, 8)
-        }[property_type]
-
-        bathrooms = bedrooms + random.choice([-1, 0, 0, 1])
-        bathrooms = max(1, bathrooms)
-
-        square_feet = {
-            "studio": random.randint(300, 800),
-            "apartment": random.randint(600, 3000),
-            "condo": random.randint(800, 3500),
-            "house": random.randint(1200, 6000),
-            "townhouse": random.randint(1000, 4000),
-            "villa": random.randint(2000, 10000)
-        }[property_type]
-
-        year_built = random.randint(1950, 2023)
-        lot_size = square_feet * random.uniform(1, 5) if property_type in ["house", "villa"] else None
-
-        # Generate location details
-        address = self._generate_address(city)
-        latitude, longitude = self._generate_coordinates(city, address)
-        neighborhood = address.split(", ")[1]
-
-        # Generate pricing
-        base_price = self._generate_base_price(property_type, city)
-
-        # Adjust price based on features
-        price_per_sqft = base_price / square_feet
-
-        # Add premium for newer properties
-        if year_built > 2010:
-            price_per_sqft *= 1.1
-
-        # Add premium for more bedrooms/bathrooms
-        if bedrooms >= 4:
-            price_per_sqft *= 1.15
-        if bathrooms >= 3:
-            price_per_sqft *= 1.1
-
-        # Calculate final price
-        price = square_feet * price_per_sqft * random.uniform(0.9, 1.1)
-
-        # Generate market information
-        days_on_market = int(random.expovariate(1/30))  # Exponential distribution with mean 30 days
-        list_date = datetime.now() - timedelta(days=days_on_market)
-
-        # Generate description
+        street_numbers = pd.Series(rng.integers(50, 5000, n) * 2).astype(str)
+        property_type = pd.Series(self._property_type_name[property_type_idx])
+        city_name = pd.Series(self._city_name[city_idx])
+        state_name = pd.Series(self._city_state[city_idx])
+        neighborhood = pd.Series(self._neighborhood_name[neighborhood_code])
+
+        address = (
+            street_numbers + " " + _pick(rng, street_names, n) + ", "
+            + neighborhood + ", " + city_name + ", " + state_name
+        )
+
+        # Generate description from one of three templates
+        bedrooms_str = pd.Series(bedrooms).astype(str)
         descriptions = [
-            f"Beautiful {bedrooms} bedroom, {bathrooms} bathroom {property_type} in {neighborhood}. "
-            f"Features {random.choice(['stunning', 'gorgeous', 'modern', 'elegant'])} "
-            f"{random.choice(['views', 'finishes', 'amenities', 'layout'])}. "
-            f"Located in {random.choice(['prime', 'desirable', 'convenient', 'quiet'])} location.",
-
-            f"Spacious {square_feet} sq ft {property_type} with {bedrooms} bedrooms. "
-            f"Perfect for {random.choice(['families', 'professionals', 'students', 'retirees'])}. "
-            f"Close to {random.choice(['schools', 'shopping', 'transportation', 'parks'])}.",
-
-            f"Recently {random.choice(['renovated', 'updated', 'remodeled'])} {property_type}. "
-            f"Features {random.choice(['hardwood floors', 'granite countertops', 'stainless steel appliances'])}. "
-            f"Don't miss this {random.choice(['opportunity', 'gem', 'find', 'deal'])}!"
+            "Beautiful " + bedrooms_str + " bedroom, " + pd.Series(bathrooms).astype(str) + " bathroom "
+            + property_type + " in " + neighborhood + ". "
+            + "Features " + _pick(rng, ["stunning", "gorgeous", "modern", "elegant"], n) + " "
+            + _pick(rng, ["views", "finishes", "amenities", "layout"], n) + ". "
+            + "Located in " + _pick(rng, ["prime", "desirable", "convenient", "quiet"], n) + " location.",
+
+            "Spacious " + pd.Series(square_feet).astype(str) + " sq ft " + property_type
+            + " with " + bedrooms_str + " bedrooms. "
+            + "Perfect for " + _pick(rng, ["families", "professionals", "students", "retirees"], n) + ". "
+            + "Close to " + _pick(rng, ["schools", "shopping", "transportation", "parks"], n) + ".",
+
+            "Recently " + _pick(rng, ["renovated", "updated", "remodeled"], n) + " " + property_type + ". "
+            + "Features " + _pick(rng, ["hardwood floors", "granite countertops", "stainless steel appliances"], n) + ". "
+            + "Don't miss this " + _pick(rng, ["opportunity", "gem", "find", "deal"], n) + "!"
         ]
-
-        description = random.choice(descriptions)
-
-        # Generate property ID
-        property_id = f"PROP_{random.randint(100000, 999999)}"
-
-        # Compile record
-        record = {
-            "id": property_id,
-            "property_type": property_type,
+        template = rng.integers(0, len(descriptions), n)
+        description = np.where(template == 0, descriptions[0], np.where(template == 1, descriptions[1], descriptions[2]))
+
+        # Generate property IDs and image counts
+        ids = "PROP_" + pd.Series(rng.integers(100000, 1000000, n)).astype(str)
+        num_images = rng.integers(5, 21, n, dtype=np.uint8)
+
+        # Select features as the k smallest of per-row random keys (a uniform sample without replacement)
+        num_features = rng.integers(self._features_low[property_type_idx], self._features_high[property_type_idx] + 1)
+        max_features = int(num_features.max())
+        keys = rng.random((n, len(self._feature_name)))
+        feature_idx = np.argpartition(keys, max_features - 1, axis=1)[:, :max_features]
+        feature_idx = np.take_along_axis(
+            feature_idx, np.take_along_axis(keys, feature_idx, axis=1).argsort(axis=1), axis=1
+        )
+        selected = np.arange(max_features) < num_features[:, None]
+        feature_mat = np.zeros((n, len(self._feature_name)), dtype=bool)
+        feature_mat[np.nonzero(selected)[0], feature_idx[selected]] = True
+        features_packed = feature_mat @ (np.uint32(1) << np.arange(len(self._feature_name), dtype=np.uint32))
+
+        # Generate market information (exponential distribution with mean 30 days)
+        days_on_market = rng.exponential(30.0, n).astype(np.int16)
+
+        now = pd.Timestamp.now()
+        list_date = now - pd.to_timedelta(days_on_market, unit="D")
+
+        statuses = ["active", "pending", "sold"]
+        sources = ["MLS", "Zillow", "Redfin", "Realtor.com", "Direct"]
+        status_code = np.where(days_on_market > 0, rng.choice(len(statuses), size=n), 0).astype(np.int8)
+        source_code = rng.choice(len(sources), size=n).astype(np.int8)
+
+        # Low-cardinality columns are stored as categorical codes
+        cols = {
+            "id": ids,
+            "property_type": pd.Categorical.from_codes(property_type_idx.astype(np.int8), categories=self.property_types),
             "address": address,
-            "neighborhood": neighborhood,
-            "city": city["name"],
-            "state": city["state"],
-            "latitude": latitude,
-            "longitude": longitude,
+            "neighborhood": pd.Categorical.from_codes(neighborhood_code, categories=self._neighborhood_name),
+            "city": pd.Categorical.from_codes(city_idx.astype(np.int8), categories=self._city_name),
+            "state": pd.Categorical.from_codes(self._city_state_code[city_idx], categories=self._states),
+            "latitude": latitude.astype(np.float32),
+            "longitude": longitude.astype(np.float32),
             "bedrooms": bedrooms,
             "bathrooms": bathrooms,
             "square_feet": square_feet,
-            "lot_size": lot_size,
+            "lot_size": lot_size.astype(np.float32),
             "year_built": year_built,
-            "price": round(price, 2),
-            "price_per_sqft": round(price_per_sqft, 2),
-            "features": self._generate_features(property_type),
+            "price": np.round(price, 2).astype(np.float32),
+            "price_per_sqft": np.round(price_per_sqft, 2).astype(np.float32),
+            **{f"has_{name}": feature_mat[:, i] for i, name in enumerate(PROPERTY_FEATURES)},
+            "features_packed": features_packed.astype(np.uint32),
             "description": description,
-            "images": self._generate_images_urls(property_id),
-            "list_date": list_date.isoformat(),
+            "num_images": num_images,
+            "list_date": list_date,
             "days_on_market": days_on_market,
-            "status": random.choice(["active", "pending", "sold"]) if days_on_market > 0 else "active",
-            "source": random.choice(["MLS", "Zillow", "Redfin", "Realtor.com", "Direct"]),
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat()
+            "status": pd.Categorical.from_codes(status_code, categories=statuses),
+            "source": pd.Categorical.from_codes(source_code, categories=sources),
+            "created_at": now,
+            "updated_at": now
         }
 
-        return record
+        return pd.DataFrame(cols, copy=False)
 
     def generate_dataset(self) -> pd.DataFrame:
         """Generate the complete dataset."""
         logger.info(f"Generating {self.num_records} property records...")
 
-        records = []
-        for i in range(self.num_records):
-            if (i + 1) % 10000 == 0:
-                logger.info(f"Generated {i + 1} records...")
-
-            record = self.generate_property_record()
-            records.append(record)
-
-        df = pd.DataFrame(records)
+        df = self._generate_batch(self.num_records)
         logger.info(f"Dataset generated successfully! Shape: {df.shape}")
 
         return df
 
-    def save_dataset(self, df: pd.DataFrame, format: str = "parquet"):
-        """Save dataset in specified format."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    def generate_dataset_parallel(self, workers: Optional[int] = None) -> pd.DataFrame:
+        """Generate the complete dataset across worker processes.
 
-        if format == "parquet":
-            file_path = f"data/properties_{timestamp}.parquet"
-            df.to_parquet(file_path, index=False)
-        elif format == "csv":
-            file_path = f"data/properties_{timestamp}.csv"
-            df.to_csv(file_path, index=False)
-        elif format == "json":
-            file_path = f"data/properties_{timestamp}.json"
-            df.to_json(file_path, orient="records", indent=2)
+        Each worker draws from its own stream spawned from ``SeedSequence(self.seed)``,
+        so with a fixed seed and worker count the records are identical across runs
+        (apart from the generation timestamps).
+        """
+        workers = workers or os.cpu_count() or 1
+        logger.info(f"Generating {self.num_records} property records with {workers} workers...")
 
-        logger.info(f"Dataset saved to: {file_path}")
+        sizes = [self.num_records // workers + (1 if i < self.num_records % workers else 0) for i in range(workers)]
+        seeds = np.random.SeedSequence(self.seed).spawn(workers)
 
-        # Also save a smaller sample for quick testing
-        sample_df = df.sample(n=min(1000, len(df)), random_state=42)
-        sample_path = f"data/properties_sample_1000.{format}"
+        # Spawn rather than fork: numba's parallel threading layer is not fork-safe
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            dfs = list(executor.map(_generate_chunk, [self] * workers, sizes, seeds))
+
+        df = pd.concat(dfs, ignore_index=True)
+        logger.info(f"Dataset generated successfully! Shape: {df.shape}")
 
+        return df
+
+    def generate_and_write(self, path: str, chunk_size: int = 10_000,
+                           csv_path: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        """Generate the dataset chunk by chunk, streaming it to Parquet (and optionally CSV)."""
+        logger.info(f"Generating {self.num_records} property records to {path}...")
+
+        writer = None
+        csv_writer = None
+        try:
+            written = 0
+            while written < self.num_records:
+                df = self._generate_batch(min(chunk_size, self.num_records - written))
+                table = pa.Table.from_pandas(df, preserve_index=False)
+
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema, compression="zstd")
+                    if csv_path:
+                        csv_writer = pa_csv.CSVWriter(csv_path, table.schema)
+                writer.write_table(table)
+                if csv_writer is not None:
+                    csv_writer.write_table(table)
+
+                written += len(df)
+                logger.info(f"Generated {written} records...")
+        finally:
+            if writer is not None:
+                writer.close()
+            if csv_writer is not None:
+                csv_writer.close()
+
+        logger.info(f"Dataset saved to: {path}")
+        if csv_path:
+            logger.info(f"Dataset saved to: {csv_path}")
+
+        return path, csv_path
+
+    def _write_frame(self, df: pd.DataFrame, file_path: str, format: str):
+        """Write a DataFrame to ``file_path`` in the given format."""
         if format == "parquet":
-            sample_df.to_parquet(sample_path, index=False)
+            df.to_parquet(file_path, index=False)
         elif format == "csv":
-            sample_df.to_csv(sample_path, index=False)
+            df.to_csv(file_path, index=False)
+        elif format == "json" and ORJSON_AVAILABLE:
+            with open(file_path, "wb") as f:
+                f.write(orjson.dumps(
+                    df.to_dict(orient="records"),
+                    default=_json_default,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+                ))
         elif format == "json":
-            sample_df.to_json(sample_path, orient="records", indent=2)
-
-        logger.info(f"Sample dataset saved to: {sample_path}")
-
-        return file_path, sample_path
+            df.to_json(file_path, orient="records", indent=2, date_format="iso")
+        else:
+            raise ValueError(f"Unsupported format: {format}")
+
+    def save_dataset(self, df: pd.DataFrame, formats: Sequence[str] = ("parquet", "csv", "json"),
+                     timestamp: Optional[str] = None) -> Dict[str, str]:
+        """Save the dataset once in each of the specified formats."""
+        timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        paths = {}
+        for format in formats:
+            file_path = f"data/properties_{timestamp}.{format}"
+            self._write_frame(df, file_path, format)
+            logger.info(f"Dataset saved to: {file_path}")
+            paths[format] = file_path
+
+        return paths
+
+    def sample_dataset(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Return a 1,000 record sample of ``df``, drawn once per DataFrame."""
+        # random_state is fixed, so reusing the sample for the same frame is safe
+        if self._sample_source is not df:
+            self._sample = df.sample(n=min(1000, len(df)), random_state=42)
+            self._sample_source = df
+        return self._sample
+
+    def save_sample(self, df: pd.DataFrame, formats: Sequence[str] = ("parquet", "csv", "json")) -> Dict[str, str]:
+        """Save a 1,000 record sample of the dataset for quick testing."""
+        sample_df = self.sample_dataset(df)
+
+        paths = {}
+        for format in formats:
+            sample_path = f"data/properties_sample_1000.{format}"
+            self._write_frame(sample_df, sample_path, format)
+            logger.info(f"Sample dataset saved to: {sample_path}")
+            paths[format] = sample_path
+
+        return paths
 
     def generate_summary_statistics(self, df: pd.DataFrame):
         """Generate and save summary statistics."""
+        # Aggregate all numeric summaries in a single pass
+        numeric_stats = df[["price", "square_feet", "bedrooms", "bathrooms", "year_built"]].agg(
+            ["min", "max", "mean", "median", "std"]
+        )
+
         stats = {
             "total_properties": len(df),
             "property_types": df["property_type"].value_counts().to_dict(),
             "cities": df["city"].value_counts().head(10).to_dict(),
             "price_stats": {
-                "min": float(df["price"].min()),
-                "max": float(df["price"].max()),
-                "mean": float(df["price"].mean()),
-                "median": float(df["price"].median()),
-                "std": float(df["price"].std())
+                "min": float(numeric_stats.at["min", "price"]),
+                "max": float(numeric_stats.at["max", "price"]),
+                "mean": float(numeric_stats.at["mean", "price"]),
+                "median": float(numeric_stats.at["median", "price"]),
+                "std": float(numeric_stats.at["std", "price"])
             },
             "square_feet_stats": {
-                "min": int(df["square_feet"].min()),
-                "max": int(df["square_feet"].max()),
-                "mean": float(df["square_feet"].mean()),
-                "median": float(df["square_feet"].median())
+                "min": int(numeric_stats.at["min", "square_feet"]),
+                "max": int(numeric_stats.at["max", "square_feet"]),
+                "mean": float(numeric_stats.at["mean", "square_feet"]),
+                "median": float(numeric_stats.at["median", "square_feet"])
             },
-            "avg_price_per_sqft_by_city": df.groupby("city")["price_per_sqft"].mean().to_dict(),
-            "avg_bedrooms": float(df["bedrooms"].mean()),
-            "avg_bathrooms": float(df["bathrooms"].mean()),
-            "avg_year_built": float(df["year_built"].mean()),
+            "avg_price_per_sqft_by_city": df.groupby("city", observed=True)["price_per_sqft"].mean().to_dict(),
+            "avg_bedrooms": float(numeric_stats.at["mean", "bedrooms"]),
+            "avg_bathrooms": float(numeric_stats.at["mean", "bathrooms"]),
+            "avg_year_built": float(numeric_stats.at["mean", "year_built"]),
             "status_distribution": df["status"].value_counts().to_dict()
         }
 
@@ -345,19 +506,22 @@ class PropertyDataGenerator:
 def main():
     """Main function to generate synthetic property data."""
     # Create data directory if it doesn't exist
-    import os
     os.makedirs("data", exist_ok=True)
 
     # Initialize generator
-    generator = PropertyDataGenerator(num_records=100000)
-
-    # Generate dataset
-    df = generator.generate_dataset()
-
-    # Save dataset in multiple formats
-    generator.save_dataset(df, format="parquet")
-    generator.save_dataset(df, format="csv")
-    generator.save_dataset(df, format="json")
+    generator = PropertyDataGenerator(num_records=100000, seed=42)
+
+    # Stream the dataset to Parquet and CSV
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    parquet_path, csv_path = generator.generate_and_write(
+        f"data/properties_{timestamp}.parquet",
+        csv_path=f"data/properties_{timestamp}.csv"
+    )
+
+    # Save the JSON export and samples from the Parquet output
+    df = pd.read_parquet(parquet_path)
+    generator.save_dataset(df, formats=("json",), timestamp=timestamp)
+    generator.save_sample(df)
 
     # Generate and save statistics
     stats = generator.generate_summary_statistics(df)
@@ -10,20 +10,31 @@ Manages pilot customer onboarding and validation:
 """
 
 import asyncio
+import hashlib
+import hmac
 import json
 import logging
-from datetime import datetime, timedelta
+import secrets
+from dataclasses import dataclass, fields
+from datetime import date, datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
-from enum import Enum
+from enum import Enum, IntFlag
 import uuid
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 from fastapi import HTTPException, status
 from pydantic import BaseModel, Field, EmailStr
-import jwt
 from passlib.context import CryptContext
-from jinja2 import Template
+from jinja2 import Environment, Template
+
+# Async HTTP client for the email provider
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
 
 from ..core.config import get_settings
 from ..core.logging import get_logger
@@ -32,9 +43,33 @@ from ..core.exceptions import ValidationError
 logger = get_logger(__name__)
 settings = get_settings()
 
-# Password context for hashing
+# Password context for hashing (human passwords only; API keys use HMAC)
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+API_KEY_PREFIX = "sk_pilot_"
+
+# Usage counters are stored as a (customer_idx, day_idx) matrix; day 0 is the epoch
+USAGE_EPOCH = date(2024, 1, 1)
+_USAGE_ROWS = 64
+_USAGE_DAYS = 1024
+_USAGE_BATCH = 1000
+# Usage stamped more than this many days after today (beyond clock skew) is dropped
+_USAGE_MAX_DAYS_AHEAD = 1
+
+SENDGRID_URL = "https://api.sendgrid.com/v3/mail/send"
+_EMAIL_CONCURRENCY = 16
+_API_KEY_PEPPER = str(getattr(settings, "API_KEY_PEPPER", settings.JWT_SECRET)).encode()
+
+
+def hash_api_key(raw_key: str) -> str:
+    """Return the keyed HMAC-SHA256 lookup digest for a raw API key."""
+    return hmac.new(_API_KEY_PEPPER, raw_key.encode(), hashlib.sha256).hexdigest()
+
+
+def _month_ord(dt: date) -> int:
+    """Integer month ordinal (``year * 12 + month - 1``) used to key monthly usage."""
+    return dt.year * 12 + dt.month - 1
+
 
 class CustomerTier(str, Enum):
     """Customer subscription tiers."""
@@ -54,6 +89,41 @@ class OnboardingStatus(str, Enum):
     CHURNED = "churned"
 
 
+class IntegrationFlag(IntFlag):
+    """Integration milestones, stored as a bitmask on the customer profile."""
+    API_ACCESS = 1
+    WEBHOOK = 2
+    FIRST_CALL = 4
+    DASHBOARD = 8
+    ALL = 15
+
+
+# Dashboard names of each integration step
+INTEGRATION_STEPS = {
+    "api_access": IntegrationFlag.API_ACCESS,
+    "webhook_configured": IntegrationFlag.WEBHOOK,
+    "first_call_made": IntegrationFlag.FIRST_CALL,
+    "dashboard_accessed": IntegrationFlag.DASHBOARD,
+}
+
+# Completed-step count for every possible integration bitmask
+_STEPS_DONE = np.array([bin(mask).count("1") for mask in range(IntegrationFlag.ALL + 1)])
+
+
+# Small integer codes for the columnar customer store
+_STATUS_CODES = {status: code for code, status in enumerate(OnboardingStatus)}
+_TIER_CODES = {tier: code for code, tier in enumerate(CustomerTier)}
+
+
+# Statuses counted as active customers in the pilot metrics
+ACTIVE_STATUSES = (
+    OnboardingStatus.API_ACCESS,
+    OnboardingStatus.INTEGRATION,
+    OnboardingStatus.TESTING,
+    OnboardingStatus.ACTIVE,
+)
+
+
 class CustomerRegistration(BaseModel):
     """Customer registration data."""
     company_name: str = Field(..., description="Company name")
@@ -68,6 +138,17 @@ class CustomerRegistration(BaseModel):
     pilot_start_date: Optional[datetime] = Field(None, description="Desired pilot start")
 
 
+class CustomerFeedback(BaseModel):
+    """Customer feedback entry."""
+    customer_id: str
+    rating: int = Field(..., ge=1, le=5, description="Rating from 1-5")
+    category: str = Field(..., description="Feedback category")
+    comments: str = Field(..., description="Feedback comments")
+    feature_requests: List[str] = Field(default_factory=list)
+    bugs_reported: List[str] = Field(default_factory=list)
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+
 class CustomerProfile(BaseModel):
     """Customer profile information."""
     customer_id: str
@@ -77,11 +158,13 @@ class CustomerProfile(BaseModel):
     created_at: datetime
     api_keys: List[Dict[str, Any]] = Field(default_factory=list)
     usage_quota: Dict[str, int] = Field(default_factory=dict)
+    # Filled from the usage matrix whenever the profile is read via get_customer
     current_usage: Dict[str, int] = Field(default_factory=dict)
     webhook_url: Optional[str] = None
-    integration_status: Dict[str, bool] = Field(default_factory=dict)
+    integration_flags: int = 0
     support_tickets: List[Dict] = Field(default_factory=list)
-    feedback_scores: List[Dict] = Field(default_factory=list)
+    open_ticket_count: int = 0
+    feedback_scores: List[CustomerFeedback] = Field(default_factory=list)
     metrics: Dict[str, Any] = Field(default_factory=dict)
 
 
@@ -96,15 +179,42 @@ class UsageMetric(BaseModel):
     model_used: Optional[str] = None
 
 
-class CustomerFeedback(BaseModel):
-    """Customer feedback entry."""
-    customer_id: str
-    rating: int = Field(..., ge=1, le=5, description="Rating from 1-5")
-    category: str = Field(..., description="Feedback category")
-    comments: str = Field(..., description="Feedback comments")
-    feature_requests: List[str] = Field(default_factory=list)
-    bugs_reported: List[str] = Field(default_factory=list)
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+@dataclass
+class _Columns:
+    """Columnar per-customer state for analytics; row i is usage-matrix row i."""
+    ids: np.ndarray
+    company_names: np.ndarray
+    tiers: np.ndarray
+    statuses: np.ndarray
+    created_at: np.ndarray
+    monthly_quota: np.ndarray
+    integration_flags: np.ndarray
+    rating_sum: np.ndarray
+    rating_count: np.ndarray
+    open_tickets: np.ndarray
+
+    @classmethod
+    def empty(cls, capacity: int) -> "_Columns":
+        return cls(
+            ids=np.empty(capacity, dtype=object),
+            company_names=np.empty(capacity, dtype=object),
+            tiers=np.zeros(capacity, dtype=np.int8),
+            statuses=np.zeros(capacity, dtype=np.int8),
+            created_at=np.zeros(capacity, dtype="datetime64[s]"),
+            monthly_quota=np.zeros(capacity, dtype=np.int32),
+            integration_flags=np.zeros(capacity, dtype=np.int8),
+            rating_sum=np.zeros(capacity, dtype=np.int32),
+            rating_count=np.zeros(capacity, dtype=np.int32),
+            open_tickets=np.zeros(capacity, dtype=np.int16),
+        )
+
+    def grow(self, capacity: int):
+        """Extend every column to ``capacity`` rows, keeping existing values."""
+        extra = _Columns.empty(capacity - len(self.ids))
+        for field in fields(self):
+            setattr(self, field.name, np.concatenate(
+                [getattr(self, field.name), getattr(extra, field.name)]
+            ))
 
 
 class PilotCustomerManager:
@@ -112,12 +222,31 @@ class PilotCustomerManager:
 
     def __init__(self):
         self.customers = {}
-        self.onboarding_templates = self._load_onboarding_templates()
+        self._email_index: Dict[str, str] = {}
+        self._api_key_index: Dict[str, str] = {}
+        self._cust_idx: Dict[str, int] = {}
+        self._month_spans: Dict[int, Tuple[int, int]] = {}
+        self._usage = np.zeros((_USAGE_ROWS, _USAGE_DAYS), dtype=np.int64)
+        self._daily_totals = np.zeros(_USAGE_DAYS, dtype=np.int64)
+        self._cols = _Columns.empty(_USAGE_ROWS)
+        self._usage_queue: asyncio.Queue = asyncio.Queue()
+        self._drain_task: Optional[asyncio.Task] = None
+        self._email_sem = asyncio.Semaphore(_EMAIL_CONCURRENCY)
+        self._background_tasks: set = set()
+        self._http: Optional["httpx.AsyncClient"] = None
+        self._compiled_templates = self._load_onboarding_templates()
         self.pilot_metrics = self._init_metrics()
+        self._status_counts: Dict[OnboardingStatus, int] = {s: 0 for s in OnboardingStatus}
+        self._tier_counts: Dict[CustomerTier, int] = {t: 0 for t in CustomerTier}
+        # customer_id -> ((day index, pilot day) computed on, recommendations)
+        self._rec_cache: Dict[str, Tuple[Tuple[int, int], List[str]]] = {}
+        self._feedback_log: Dict[str, list] = {
+            "customer_id": [], "rating": [], "category": [], "timestamp": []
+        }
 
-    def _load_onboarding_templates(self) -> Dict:
-        """Load onboarding email templates."""
-        return {
+    def _load_onboarding_templates(self) -> Dict[str, Template]:
+        """Load and compile onboarding email templates."""
+        raw_templates = {
             "welcome": """
             <h2>Welcome to Gogidix AI Services Pilot Program!</h2>
             <p>Hi {{ contact_name }},</p>
@@ -159,6 +288,10 @@ class PilotCustomerManager:
             """
         }
 
+        # Compile once; customer-supplied fields are HTML-escaped on render
+        env = Environment(autoescape=True)
+        return {name: env.from_string(source) for name, source in raw_templates.items()}
+
     def _init_metrics(self) -> Dict:
         """Initialize pilot metrics tracking."""
         return {
@@ -181,7 +314,8 @@ class PilotCustomerManager:
         logger.info(f"Registering new customer: {registration.company_name}")
 
         # Check if customer already exists
-        if any(c.email == registration.email for c in self.customers.values()):
+        email_key = registration.email.lower()
+        if email_key in self._email_index:
             raise ValidationError("Email already registered")
 
         # Generate customer ID
@@ -191,37 +325,45 @@ class PilotCustomerManager:
         tier = self._determine_tier(registration)
 
         # Create customer profile
+        now = datetime.utcnow()
         customer = CustomerProfile(
             customer_id=customer_id,
             registration=registration,
             tier=tier,
             status=OnboardingStatus.REGISTERED,
-            created_at=datetime.utcnow(),
+            created_at=now,
             usage_quota=self._get_tier_quota(tier),
-            current_usage={},
-            integration_status={
-                "api_access": False,
-                "webhook_configured": False,
-                "first_call_made": False,
-                "dashboard_accessed": False
-            }
         )
 
         # Generate API keys
-        api_key = self._generate_api_key(customer_id)
+        api_key, hashed_key = self._generate_api_key(customer_id)
         customer.api_keys.append({
             "key_id": f"key_{uuid.uuid4().hex[:8]}",
-            "api_key": api_key,
-            "created_at": datetime.utcnow(),
+            "key_prefix": api_key[:len(API_KEY_PREFIX) + 4],
+            "hashed_key": hashed_key,
+            "created_at": now,
             "last_used": None,
             "status": "active"
         })
 
-        # Save customer
+        # Save customer and reserve its usage row and columns
         self.customers[customer_id] = customer
-
-        # Send welcome email
-        await self._send_onboarding_email(customer, "welcome", {
+        self._email_index[email_key] = customer_id
+        self._status_counts[customer.status] += 1
+        self._tier_counts[tier] += 1
+        idx = self._cust_idx[customer_id] = len(self._cust_idx)
+        self._ensure_usage_capacity(idx + 1, 0)
+
+        cols = self._cols
+        cols.ids[idx] = customer_id
+        cols.company_names[idx] = registration.company_name
+        cols.tiers[idx] = _TIER_CODES[tier]
+        cols.statuses[idx] = _STATUS_CODES[customer.status]
+        cols.created_at[idx] = np.datetime64(now, "s")
+        cols.monthly_quota[idx] = customer.usage_quota.get("monthly_calls", 1)
+
+        # Send welcome email in the background
+        self._schedule_email(customer, "welcome", {
             "api_key": api_key,
             "environment": "pilot",
             "dashboard_url": f"https://pilot.gogidix.com/dashboard/{customer_id}"
@@ -273,28 +415,42 @@ class PilotCustomerManager:
         }
         return quotas.get(tier, quotas[CustomerTier.TRIAL])
 
-    def _generate_api_key(self, customer_id: str) -> str:
-        """Generate API key for customer."""
-        # Generate key with customer ID prefix
-        key_body = uuid.uuid4().hex
-        timestamp = int(datetime.utcnow().timestamp())
-        signature = jwt.encode(
-            {
-                "customer_id": customer_id,
-                "timestamp": timestamp,
-                "type": "api_key"
-            },
-            settings.JWT_SECRET,
-            algorithm="HS256"
-        )
-        return f"sk_pilot_{signature[:32]}"
+    def _generate_api_key(self, customer_id: str) -> Tuple[str, str]:
+        """Generate API key for customer.
+
+        Returns the raw key (shown once) and its HMAC digest, which is the
+        only form kept on the customer record and in the lookup index.
+        """
+        api_key = f"{API_KEY_PREFIX}{secrets.token_urlsafe(32)}"
+        hashed_key = hash_api_key(api_key)
+        self._api_key_index[hashed_key] = customer_id
+        return api_key, hashed_key
+
+    def verify_api_key(self, api_key: str) -> Optional[str]:
+        """Resolve a presented API key to its customer ID, if active."""
+        if not api_key.startswith(API_KEY_PREFIX):
+            return None
+        return self._api_key_index.get(hash_api_key(api_key))
+
+    async def get_customer(self, customer_id: str) -> CustomerProfile:
+        """Get a customer profile with ``current_usage`` read from the usage matrix."""
+        customer = self.customers.get(customer_id)
+        if not customer:
+            raise ValidationError("Customer not found")
+
+        now = datetime.utcnow()
+        today_ord = self._day_index(now.date())
+        row = self._usage[self._cust_idx[customer_id]]
+        customer.current_usage = {
+            "daily_calls": int(row[today_ord]) if 0 <= today_ord < row.size else 0,
+            "monthly_calls": self._month_usage(customer_id, _month_ord(now)),
+        }
+        return customer
 
     async def _send_onboarding_email(self, customer: CustomerProfile,
                                     template_name: str,
                                     context: Dict[str, Any]):
         """Send onboarding email using template."""
-        template = Template(self.onboarding_templates[template_name])
-
         # Merge context with customer data
         full_context = {
             "contact_name": customer.registration.contact_name,
@@ -303,74 +459,228 @@ class PilotCustomerManager:
             **context
         }
 
-        html_content = template.render(**full_context)
+        html_content = self._compiled_templates[template_name].render(full_context)
+        subject = f"Gogidix AI Pilot: {template_name.replace('_', ' ').title()}"
 
-        # In production, use email service (SendGrid, SES, etc.)
         logger.info(f"Sending {template_name} email to {customer.registration.email}")
-        # await email_service.send_email(
-        #     to=customer.registration.email,
-        #     subject=f"Gogidix AI Pilot: {template_name.replace('_', ' ').title()}",
-        #     html_content=html_content
-        # )
-
-    async def track_api_usage(self, metric: UsageMetric):
-        """Track API usage for customer."""
-        customer = self.customers.get(metric.customer_id)
-        if not customer:
-            logger.warning(f"Usage for unknown customer: {metric.customer_id}")
+        api_key = getattr(settings, "SENDGRID_API_KEY", None)
+        if not (HTTPX_AVAILABLE and api_key):
             return
 
-        # Update usage counters
-        today = metric.timestamp.date()
-        today_str = today.isoformat()
-
-        if "daily" not in customer.current_usage:
-            customer.current_usage["daily"] = {}
+        async with self._email_sem:
+            if self._http is None:
+                self._http = httpx.AsyncClient(timeout=10.0)
+            response = await self._http.post(
+                SENDGRID_URL,
+                headers={"Authorization": f"Bearer {api_key}"},
+                json={
+                    "personalizations": [{"to": [{"email": customer.registration.email}]}],
+                    "from": {"email": getattr(settings, "PILOT_EMAIL_FROM", "pilot@gogidix.com")},
+                    "subject": subject,
+                    "content": [{"type": "text/html", "value": html_content}],
+                },
+            )
+            response.raise_for_status()
 
-        if today_str not in customer.current_usage["daily"]:
-            customer.current_usage["daily"][today_str] = 0
+    def _schedule_email(self, customer: CustomerProfile, template_name: str,
+                        context: Dict[str, Any]):
+        """Send an onboarding email as a fire-and-forget background task."""
+        task = asyncio.create_task(
+            self._send_onboarding_email(customer, template_name, context)
+        )
+        self._background_tasks.add(task)
+        task.add_done_callback(self._on_email_done)
+
+    def _on_email_done(self, task: asyncio.Task):
+        """Drop a finished email task and log its failure, if any."""
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Onboarding email failed: {task.exception()}")
+
+    async def close(self):
+        """Flush usage, wait for pending emails and release the HTTP client."""
+        await self.stop_usage_drain()
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def _day_index(self, day: date) -> int:
+        """Column of ``day`` in the usage matrix."""
+        return (day - USAGE_EPOCH).days
+
+    def _month_span(self, month: int) -> Tuple[int, int]:
+        """Half-open usage-matrix column range covering a month ordinal."""
+        span = self._month_spans.get(month)
+        if span is None:
+            start_year, start_month = divmod(month, 12)
+            end_year, end_month = divmod(month + 1, 12)
+            start = self._day_index(date(start_year, start_month + 1, 1))
+            end = self._day_index(date(end_year, end_month + 1, 1))
+            span = self._month_spans[month] = (max(start, 0), max(end, 0))
+        return span
+
+    def _ensure_usage_capacity(self, rows: int, days: int):
+        """Grow the usage matrix by doubling so it holds ``rows`` x ``days``."""
+        cur_rows, cur_days = self._usage.shape
+        if rows <= cur_rows and days <= cur_days:
+            return
+        new_rows, new_days = cur_rows, cur_days
+        while new_rows < rows:
+            new_rows *= 2
+        while new_days < days:
+            new_days *= 2
+        grown = np.zeros((new_rows, new_days), dtype=np.int64)
+        grown[:cur_rows, :cur_days] = self._usage
+        self._usage = grown
+        if new_rows > cur_rows:
+            self._cols.grow(new_rows)
+        if new_days > cur_days:
+            self._daily_totals = np.concatenate(
+                [self._daily_totals, np.zeros(new_days - cur_days, dtype=np.int64)]
+            )
 
-        customer.current_usage["daily"][today_str] += 1
+    def _month_usage(self, customer_id: str, month: int) -> int:
+        """Calls made by a customer during a month ordinal."""
+        start, end = self._month_span(month)
+        return int(self._usage[self._cust_idx[customer_id], start:end].sum())
 
-        # Update current month
-        month_str = today.strftime("%Y-%m")
-        if "monthly" not in customer.current_usage:
-            customer.current_usage["monthly"] = {}
+    def start_usage_drain(self):
+        """Start the background task that applies queued usage metrics."""
+        if self._drain_task is None or self._drain_task.done():
+            self._drain_task = asyncio.create_task(self._drain_usage())
 
-        if month_str not in customer.current_usage["monthly"]:
-            customer.current_usage["monthly"][month_str] = 0
+    async def stop_usage_drain(self):
+        """Apply any queued usage metrics and stop the background task."""
+        if self._drain_task is None:
+            return
+        await self.flush_usage()
+        self._drain_task.cancel()
+        try:
+            await self._drain_task
+        except asyncio.CancelledError:
+            pass
+        self._drain_task = None
 
-        customer.current_usage["monthly"][month_str] += 1
+    async def flush_usage(self):
+        """Wait until every queued usage metric has been applied."""
+        if self._drain_task is not None and not self._drain_task.done():
+            await self._usage_queue.join()
 
-        # Check integration milestones
-        if not customer.integration_status["first_call_made"]:
-            customer.integration_status["first_call_made"] = True
-            await self._handle_milestone(customer, "first_api_call")
+    async def track_api_usage(self, metric: UsageMetric):
+        """Track API usage for customer.
+
+        Only enqueues the metric; counters, milestones and quota checks are
+        applied in batches by ``_drain_usage``.
+        """
+        self.start_usage_drain()
+        self._usage_queue.put_nowait(metric)
+
+    async def _drain_usage(self):
+        """Apply queued usage metrics in batches of up to ``_USAGE_BATCH``."""
+        while True:
+            batch = [await self._usage_queue.get()]
+            while len(batch) < _USAGE_BATCH and not self._usage_queue.empty():
+                batch.append(self._usage_queue.get_nowait())
+            try:
+                await self._apply_usage_batch(batch)
+            except Exception:
+                logger.exception(f"Failed to apply {len(batch)} usage metrics")
+            finally:
+                for _ in batch:
+                    self._usage_queue.task_done()
+
+    async def _apply_usage_batch(self, batch: List[UsageMetric]):
+        """Update usage counters, milestones and quotas for a batch of metrics."""
+        now = datetime.utcnow()
+        latest_day = self._day_index(now.date()) + _USAGE_MAX_DAYS_AHEAD
+        idxs, days = [], []
+        touched: Dict[str, CustomerProfile] = {}
+        for metric in batch:
+            idx = self._cust_idx.get(metric.customer_id)
+            if idx is None:
+                logger.warning(f"Usage for unknown customer: {metric.customer_id}")
+                continue
+            day = self._day_index(metric.timestamp.date())
+            if day < 0:
+                logger.warning(f"Usage before {USAGE_EPOCH} ignored for {metric.customer_id}")
+                continue
+            if day > latest_day:
+                logger.warning(
+                    f"Usage dated {metric.timestamp.date()} ignored for {metric.customer_id}"
+                )
+                continue
+            idxs.append(idx)
+            days.append(day)
+            touched[metric.customer_id] = self.customers[metric.customer_id]
+
+        if not idxs:
+            return
 
-        # Check if approaching quota
-        await self._check_usage_quota(customer)
+        # Update usage counters
+        idxs = np.asarray(idxs, dtype=np.intp)
+        days = np.asarray(days, dtype=np.intp)
+        self._ensure_usage_capacity(0, int(days.max()) + 1)
+        np.add.at(self._usage, (idxs, days), 1)
+        np.add.at(self._daily_totals, days, 1)
 
         # Update global metrics
-        self.pilot_metrics["total_api_calls"] += 1
+        self.pilot_metrics["total_api_calls"] += len(idxs)
+        for customer_id in touched:
+            self._rec_cache.pop(customer_id, None)
+
+        # Check integration milestones and quotas once per customer in the batch
+        current_month = _month_ord(now)
+        first_callers = [
+            c for c in touched.values()
+            if not c.integration_flags & IntegrationFlag.FIRST_CALL
+        ]
+        for customer in first_callers:
+            self._set_integration_flag(customer, IntegrationFlag.FIRST_CALL)
+
+        await asyncio.gather(
+            *(self._handle_milestone(c, "first_api_call", now) for c in first_callers),
+            *(self._check_usage_quota(c, current_month) for c in touched.values()),
+        )
 
-    async def _handle_milestone(self, customer: CustomerProfile, milestone: str):
+    def _set_status(self, customer: CustomerProfile, new_status: OnboardingStatus):
+        """Move a customer to a new onboarding status, keeping counts in sync."""
+        self._status_counts[customer.status] -= 1
+        self._status_counts[new_status] += 1
+        customer.status = new_status
+        self._cols.statuses[self._cust_idx[customer.customer_id]] = _STATUS_CODES[new_status]
+
+    def _set_integration_flag(self, customer: CustomerProfile, flag: IntegrationFlag):
+        """Mark an integration step complete on the profile and the columns."""
+        customer.integration_flags |= flag
+        self._rec_cache.pop(customer.customer_id, None)
+        self._cols.integration_flags[self._cust_idx[customer.customer_id]] = (
+            customer.integration_flags
+        )
+
+    async def _handle_milestone(self, customer: CustomerProfile, milestone: str,
+                                now: Optional[datetime] = None):
         """Handle customer milestone."""
+        now = now or datetime.utcnow()
         logger.info(f"Milestone reached for {customer.customer_id}: {milestone}")
 
         if milestone == "first_api_call":
-            customer.status = OnboardingStatus.TESTING
-            await self._send_onboarding_email(customer, "integration_complete", {
-                "days_in_pilot": (datetime.utcnow() - customer.created_at).days,
-                "total_calls": sum(customer.current_usage.get("monthly", {}).values()),
+            self._set_status(customer, OnboardingStatus.TESTING)
+            self._schedule_email(customer, "integration_complete", {
+                "days_in_pilot": (now - customer.created_at).days,
+                "total_calls": int(self._usage[self._cust_idx[customer.customer_id]].sum()),
                 "avg_response_time": "150",
                 "success_rate": "99.5"
             })
 
-    async def _check_usage_quota(self, customer: CustomerProfile):
+    async def _check_usage_quota(self, customer: CustomerProfile,
+                                 current_month: Optional[int] = None):
         """Check if customer is approaching usage quota."""
         # Get current month usage
-        current_month = datetime.utcnow().strftime("%Y-%m")
-        monthly_usage = customer.current_usage.get("monthly", {}).get(current_month, 0)
+        if current_month is None:
+            current_month = _month_ord(datetime.utcnow())
+        monthly_usage = self._month_usage(customer.customer_id, current_month)
         monthly_quota = customer.usage_quota.get("monthly_calls", 0)
 
         # Check if at 80% of quota
@@ -389,15 +699,24 @@ class PilotCustomerManager:
             raise ValidationError("Customer not found")
 
         # Store feedback
-        customer.feedback_scores.append(feedback.dict())
-
-        # Calculate average rating
-        if customer.feedback_scores:
-            ratings = [f["rating"] for f in customer.feedback_scores]
-            customer.metrics["average_rating"] = sum(ratings) / len(ratings)
+        customer.feedback_scores.append(feedback)
+        for column, values in self._feedback_log.items():
+            values.append(getattr(feedback, column))
+
+        # Running rating totals; the columns feed the dashboard and analytics
+        idx = self._cust_idx[customer.customer_id]
+        self._cols.rating_sum[idx] += feedback.rating
+        self._cols.rating_count[idx] += 1
+        self._rec_cache.pop(customer.customer_id, None)
+
+        # Update running average rating on the profile
+        metrics = customer.metrics
+        metrics["rating_sum"] = metrics.get("rating_sum", 0) + feedback.rating
+        metrics["rating_count"] = metrics.get("rating_count", 0) + 1
+        metrics["average_rating"] = metrics["rating_sum"] / metrics["rating_count"]
 
         # Update global metrics
-        await self._update_global_metrics()
+        await self.update_global_metrics()
 
         # Handle low ratings
         if feedback.rating <= 2:
@@ -419,6 +738,8 @@ class PilotCustomerManager:
             "status": "open"
         }
         customer.support_tickets.append(ticket)
+        customer.open_ticket_count += 1
+        self._cols.open_tickets[self._cust_idx[customer.customer_id]] += 1
 
         # Notify customer success team
         # await slack_service.send_alert(
@@ -426,6 +747,27 @@ class PilotCustomerManager:
         #     message=f"Low feedback alert from {customer.registration.company_name}: {feedback.comments}"
         # )
 
+    async def close_support_ticket(self, customer_id: str, ticket_id: str):
+        """Close an open support ticket."""
+        customer = self.customers.get(customer_id)
+        if not customer:
+            raise ValidationError("Customer not found")
+
+        for ticket in customer.support_tickets:
+            if ticket["ticket_id"] == ticket_id:
+                self._close_ticket(customer, ticket)
+                return
+        raise ValidationError("Ticket not found")
+
+    def _close_ticket(self, customer: CustomerProfile, ticket: Dict):
+        """Mark a ticket closed, keeping the open-ticket counts in sync."""
+        if ticket["status"] != "open":
+            return
+        ticket["status"] = "closed"
+        ticket["closed_at"] = datetime.utcnow()
+        customer.open_ticket_count -= 1
+        self._cols.open_tickets[self._cust_idx[customer.customer_id]] -= 1
+
     async def get_customer_dashboard(self, customer_id: str) -> Dict[str, Any]:
         """Get customer dashboard data."""
         customer = self.customers.get(customer_id)
@@ -433,32 +775,39 @@ class PilotCustomerManager:
             raise ValidationError("Customer not found")
 
         # Calculate metrics
-        current_month = datetime.utcnow().strftime("%Y-%m")
-        monthly_usage = customer.current_usage.get("monthly", {}).get(current_month, 0)
-        daily_usage = customer.current_usage.get("daily", {})
-
-        # Get recent activity
-        recent_calls = sum(
-            count for date, count in daily_usage.items()
-            if datetime.fromisoformat(date) >= datetime.utcnow() - timedelta(days=7)
+        now = datetime.utcnow()
+        today_ord = self._day_index(now.date())
+        pilot_days = (now - customer.created_at).days
+        monthly_usage = self._month_usage(customer_id, _month_ord(now))
+
+        # Get recent activity (today and the six days before it)
+        recent_calls = int(
+            self._usage[self._cust_idx[customer_id], max(today_ord - 6, 0):today_ord + 1].sum()
         )
 
         # Calculate integration progress
-        completed_steps = sum(
-            1 for completed in customer.integration_status.values() if completed
-        )
-        total_steps = len(customer.integration_status)
+        flags = customer.integration_flags
+        completed_steps = int(_STEPS_DONE[flags])
+        total_steps = len(INTEGRATION_STEPS)
         integration_progress = (completed_steps / total_steps) * 100
 
-        # Generate recommendations
-        recommendations = await self._generate_recommendations(customer)
+        # Generate recommendations, reusing the result until the customer changes,
+        # the calendar day rolls over (monthly usage) or the pilot day does (the
+        # pilot-ending advice; it rolls over at the customer's sign-up time)
+        cache_key = (today_ord, pilot_days)
+        cached = self._rec_cache.get(customer_id)
+        if cached is not None and cached[0] == cache_key:
+            recommendations = cached[1]
+        else:
+            recommendations = await self._generate_recommendations(customer, now)
+            self._rec_cache[customer_id] = (cache_key, recommendations)
 
         return {
             "customer_info": {
                 "company_name": customer.registration.company_name,
                 "tier": customer.tier.value,
                 "status": customer.status.value,
-                "pilot_days": (datetime.utcnow() - customer.created_at).days
+                "pilot_days": pilot_days
             },
             "usage_metrics": {
                 "monthly_calls": monthly_usage,
@@ -470,18 +819,20 @@ class PilotCustomerManager:
                 "percentage": integration_progress,
                 "completed_steps": completed_steps,
                 "total_steps": total_steps,
-                "status": customer.integration_status
+                "status": {
+                    name: bool(flags & flag) for name, flag in INTEGRATION_STEPS.items()
+                }
             },
             "feedback": {
-                "average_rating": customer.metrics.get("average_rating", 0),
+                "average_rating": self._average_rating(self._cust_idx[customer_id]),
                 "total_feedback": len(customer.feedback_scores),
                 "last_feedback": customer.feedback_scores[-1] if customer.feedback_scores else None
             },
             "support": {
-                "open_tickets": len([t for t in customer.support_tickets if t["status"] == "open"]),
+                "open_tickets": customer.open_ticket_count,
                 "total_tickets": len(customer.support_tickets)
             },
-            "recommendations": recommendations,
+            "recommendations": list(recommendations),
             "quick_actions": [
                 "View API documentation",
                 "Schedule support call",
@@ -490,13 +841,14 @@ class PilotCustomerManager:
             ]
         }
 
-    async def _generate_recommendations(self, customer: CustomerProfile) -> List[str]:
+    async def _generate_recommendations(self, customer: CustomerProfile,
+                                        now: Optional[datetime] = None) -> List[str]:
         """Generate personalized recommendations."""
         recommendations = []
+        now = now or datetime.utcnow()
 
         # Check usage patterns
-        current_month = datetime.utcnow().strftime("%Y-%m")
-        usage = customer.current_usage.get("monthly", {}).get(current_month, 0)
+        usage = self._month_usage(customer.customer_id, _month_ord(now))
         quota = customer.usage_quota.get("monthly_calls", 0)
 
         if usage == 0:
@@ -507,7 +859,7 @@ class PilotCustomerManager:
             recommendations.append("Consider upgrading your plan for more API calls")
 
         # Check integration status
-        if not customer.integration_status["webhook_configured"]:
+        if not customer.integration_flags & IntegrationFlag.WEBHOOK:
             recommendations.append("Set up webhooks for real-time updates")
 
         # Check feedback
@@ -515,57 +867,55 @@ class PilotCustomerManager:
             recommendations.append("Share your feedback to help us improve")
 
         # Check pilot duration
-        pilot_days = (datetime.utcnow() - customer.created_at).days
+        pilot_days = (now - customer.created_at).days
         if pilot_days > 25:
             recommendations.append("Your pilot is ending soon. Schedule a review call")
 
         return recommendations
 
-    async def update_global_metrics(self):
-        """Update global pilot metrics."""
-        active_customers = sum(
-            1 for c in self.customers.values()
-            if c.status in [OnboardingStatus.API_ACCESS, OnboardingStatus.INTEGRATION,
-                           OnboardingStatus.TESTING, OnboardingStatus.ACTIVE]
-        )
-
-        # Calculate average rating
-        all_ratings = []
-        for customer in self.customers.values():
-            all_ratings.extend([f["rating"] for f in customer.feedback_scores])
-
-        avg_rating = sum(all_ratings) / len(all_ratings) if all_ratings else 0
+    def _average_rating(self, idx: Optional[int] = None) -> float:
+        """Average rating of the customer in row ``idx``, or of all feedback when None."""
+        cols = self._cols
+        if idx is None:
+            n = len(self._cust_idx)
+            rating_sum, rating_count = int(cols.rating_sum[:n].sum()), int(cols.rating_count[:n].sum())
+        else:
+            rating_sum, rating_count = int(cols.rating_sum[idx]), int(cols.rating_count[idx])
+        return rating_sum / rating_count if rating_count else 0
 
-        # Update metrics
+    async def update_global_metrics(self):
+        """Update global pilot metrics from the maintained counters."""
         self.pilot_metrics.update({
-            "active_customers": active_customers,
-            "average_rating": avg_rating,
+            "active_customers": sum(self._status_counts[s] for s in ACTIVE_STATUSES),
+            "average_rating": self._average_rating(),
             "customer_tiers": {
-                tier.value: sum(1 for c in self.customers.values() if c.tier == tier)
-                for tier in CustomerTier
+                tier.value: count for tier, count in self._tier_counts.items()
             }
         })
 
     async def get_pilot_analytics(self) -> Dict[str, Any]:
         """Get comprehensive pilot program analytics."""
         await self.update_global_metrics()
+        now = datetime.utcnow()
+        frame = self._customer_frame(now)
 
         # Customer acquisition funnel
-        customers_by_status = {}
-        for status in OnboardingStatus:
-            customers_by_status[status.value] = sum(
-                1 for c in self.customers.values() if c.status == status
-            )
-
-        # Usage trends
-        daily_usage = {}
-        for customer in self.customers.values():
-            for date, count in customer.current_usage.get("daily", {}).items():
-                daily_usage[date] = daily_usage.get(date, 0) + count
+        customers_by_status = {
+            status.value: count for status, count in self._status_counts.items()
+        }
 
-        # Sort dates
-        sorted_usage = sorted(daily_usage.items(), key=lambda x: x[0])
-        usage_trend = [{"date": date, "calls": count} for date, count in sorted_usage[-30:]]
+        # Usage trends over the last 30 days
+        today_ord = self._day_index(now.date())
+        self._ensure_usage_capacity(0, today_ord + 1)
+        first_day = max(today_ord - 29, 0)
+        trend_dates = np.datetime64(USAGE_EPOCH, "D") + np.arange(first_day, today_ord + 1)
+        usage_trend = [
+            {"date": day, "calls": calls}
+            for day, calls in zip(
+                trend_dates.astype(str).tolist(),
+                self._daily_totals[first_day:today_ord + 1].tolist(),
+            )
+        ]
 
         # Feature usage
         feature_usage = {}
@@ -575,18 +925,10 @@ class PilotCustomerManager:
                 feature_usage[category] = feature_usage.get(category, 0) + 1
 
         # Feedback analysis
-        feedback_by_category = {}
-        for customer in self.customers.values():
-            for feedback in customer.feedback_scores:
-                category = feedback["category"]
-                if category not in feedback_by_category:
-                    feedback_by_category[category] = []
-                feedback_by_category[category].append(feedback["rating"])
-
-        avg_ratings_by_category = {
-            cat: sum(ratings) / len(ratings)
-            for cat, ratings in feedback_by_category.items()
-        }
+        feedback = self._feedback_frame()
+        avg_ratings_by_category = (
+            feedback.groupby("category", sort=False)["rating"].mean().to_dict()
+        )
 
         return {
             "overview": self.pilot_metrics,
@@ -595,86 +937,101 @@ class PilotCustomerManager:
             "feature_usage": feature_usage,
             "feedback_analysis": {
                 "average_by_category": avg_ratings_by_category,
-                "total_feedback": sum(len(c.feedback_scores) for c in self.customers.values())
+                "total_feedback": len(feedback)
             },
-            "top_performers": await self._get_top_performers(),
-            "at_risk_customers": await self._get_at_risk_customers()
+            "top_performers": await self._get_top_performers(frame),
+            "at_risk_customers": await self._get_at_risk_customers(frame)
         }
 
-    async def _get_top_performers(self) -> List[Dict]:
-        """Get top performing pilot customers."""
-        performers = []
-
-        for customer in self.customers.values():
-            # Calculate score based on usage, integration, and feedback
-            usage_score = min(customer.current_usage.get("monthly", {}).get(
-                datetime.utcnow().strftime("%Y-%m"), 0
-            ) / customer.usage_quota.get("monthly_calls", 1), 1.0)
-
-            integration_score = sum(
-                1 for completed in customer.integration_status.values() if completed
-            ) / len(customer.integration_status)
-
-            feedback_score = customer.metrics.get("average_rating", 0) / 5
+    def _feedback_frame(self) -> pd.DataFrame:
+        """All collected feedback as one frame, one row per submission."""
+        return pd.DataFrame(self._feedback_log)
+
+    def _customer_frame(self, now: datetime) -> pd.DataFrame:
+        """Build a one-row-per-customer frame of the inputs used for scoring."""
+        n = len(self._cust_idx)
+        cols = self._cols
+        start, end = self._month_span(_month_ord(now))
+        cutoff = now - timedelta(days=30)
+
+        customer_ids = pd.Series(cols.ids[:n], dtype=object)
+        feedback = self._feedback_frame()
+        recent_ratings = (
+            feedback[feedback["timestamp"] >= cutoff]
+            .groupby("customer_id")["rating"].mean()
+        )
 
-            overall_score = (usage_score * 0.4 + integration_score * 0.3 + feedback_score * 0.3)
+        rating_count = cols.rating_count[:n]
+        avg_rating = np.divide(
+            cols.rating_sum[:n], rating_count,
+            out=np.zeros(n), where=rating_count > 0,
+        )
+        pilot_days = (np.datetime64(now, "s") - cols.created_at[:n]) // np.timedelta64(1, "D")
+
+        return pd.DataFrame({
+            "customer_id": customer_ids,
+            "company_name": cols.company_names[:n],
+            "monthly_usage": self._usage[:n, start:end].sum(axis=1),
+            "monthly_quota": cols.monthly_quota[:n],
+            "integration_done": _STEPS_DONE[cols.integration_flags[:n]],
+            "integration_total": len(INTEGRATION_STEPS),
+            "avg_rating": avg_rating,
+            "recent_rating": customer_ids.map(recent_ratings).astype(float),
+            "open_tickets": cols.open_tickets[:n],
+            "pilot_days": pilot_days,
+            "is_active": cols.statuses[:n] == _STATUS_CODES[OnboardingStatus.ACTIVE],
+        })
 
-            performers.append({
-                "customer_id": customer.customer_id,
-                "company_name": customer.registration.company_name,
-                "overall_score": overall_score,
-                "usage_score": usage_score,
-                "integration_score": integration_score,
-                "feedback_score": feedback_score
-            })
+    async def _get_top_performers(self, frame: Optional[pd.DataFrame] = None) -> List[Dict]:
+        """Get top performing pilot customers."""
+        df = self._customer_frame(datetime.utcnow()) if frame is None else frame
+
+        # Calculate score based on usage, integration, and feedback
+        scores = pd.DataFrame({
+            "customer_id": df["customer_id"],
+            "company_name": df["company_name"],
+            "usage_score": np.minimum(df["monthly_usage"] / df["monthly_quota"], 1.0),
+            "integration_score": df["integration_done"] / df["integration_total"],
+            "feedback_score": df["avg_rating"] / 5,
+        })
+        scores["overall_score"] = (
+            scores["usage_score"] * 0.4
+            + scores["integration_score"] * 0.3
+            + scores["feedback_score"] * 0.3
+        )
 
         # Return top 10
-        return sorted(performers, key=lambda x: x["overall_score"], reverse=True)[:10]
+        columns = ["customer_id", "company_name", "overall_score",
+                   "usage_score", "integration_score", "feedback_score"]
+        return scores.nlargest(10, "overall_score")[columns].to_dict("records")
 
-    async def _get_at_risk_customers(self) -> List[Dict]:
+    async def _get_at_risk_customers(self, frame: Optional[pd.DataFrame] = None) -> List[Dict]:
         """Get customers at risk of churn."""
-        at_risk = []
-
-        for customer in self.customers.values():
-            risk_factors = []
-
-            # Check usage
-            current_month = datetime.utcnow().strftime("%Y-%m")
-            usage = customer.current_usage.get("monthly", {}).get(current_month, 0)
-            if usage == 0:
-                risk_factors.append("No usage this month")
-            elif usage < customer.usage_quota.get("monthly_calls", 1) * 0.1:
-                risk_factors.append("Low usage")
-
-            # Check feedback
-            recent_feedback = [
-                f for f in customer.feedback_scores
-                if (datetime.utcnow() - f["timestamp"]).days <= 30
-            ]
-            if recent_feedback:
-                avg_rating = sum(f["rating"] for f in recent_feedback) / len(recent_feedback)
-                if avg_rating <= 2:
-                    risk_factors.append("Low satisfaction rating")
-
-            # Check support tickets
-            open_tickets = len([t for t in customer.support_tickets if t["status"] == "open"])
-            if open_tickets > 3:
-                risk_factors.append("Multiple open support tickets")
-
-            # Check pilot duration
-            pilot_days = (datetime.utcnow() - customer.created_at).days
-            if pilot_days > 30 and customer.status != OnboardingStatus.ACTIVE:
-                risk_factors.append("Extended pilot without activation")
-
-            if risk_factors:
-                at_risk.append({
-                    "customer_id": customer.customer_id,
-                    "company_name": customer.registration.company_name,
-                    "risk_factors": risk_factors,
-                    "risk_score": len(risk_factors) / 4  # Normalize to 0-1
-                })
-
-        return sorted(at_risk, key=lambda x: x["risk_score"], reverse=True)
+        df = self._customer_frame(datetime.utcnow()) if frame is None else frame
+
+        no_usage = df["monthly_usage"] == 0
+        risk_masks = {
+            "No usage this month": no_usage,
+            "Low usage": ~no_usage & (df["monthly_usage"] < df["monthly_quota"] * 0.1),
+            "Low satisfaction rating": df["recent_rating"] <= 2,
+            "Multiple open support tickets": df["open_tickets"] > 3,
+            "Extended pilot without activation": (df["pilot_days"] > 30) & ~df["is_active"],
+        }
+        flags = pd.DataFrame(risk_masks)
+        risk_count = flags.sum(axis=1)
+        at_risk = risk_count > 0
+
+        labels = np.array(list(risk_masks))
+        risk_factors = [labels[row].tolist() for row in flags[at_risk].to_numpy()]
+
+        result = pd.DataFrame({
+            "customer_id": df["customer_id"][at_risk],
+            "company_name": df["company_name"][at_risk],
+            "risk_factors": risk_factors,
+            "risk_score": risk_count[at_risk] / 4,  # Normalize to 0-1
+        })
+        result = result.sort_values("risk_score", ascending=False, kind="stable")
+        return result.to_dict("records")
 
 
 # Global instance
@@ -9,6 +9,16 @@ os.makedirs('data', exist_ok=True)
 conn = sqlite3.connect('data/gogidix_ai.db')
 cursor = conn.cursor()
 
+# WAL persists in the database file; the remaining PRAGMAs are per-connection
+# and should be repeated by whatever opens this database for writing
+cursor.executescript('''
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA mmap_size=268435456;
+    PRAGMA cache_size=-65536;
+''')
+
 # Create tables
 cursor.executescript('''
     -- Properties table
@@ -54,6 +64,11 @@ cursor.executescript('''
         metrics TEXT,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     );
+
+    -- Indexes (users.email and api_keys.key_id are already indexed via UNIQUE)
+    CREATE INDEX IF NOT EXISTS idx_api_keys_hashed_key ON api_keys(hashed_key);
+    CREATE INDEX IF NOT EXISTS idx_api_keys_user_id ON api_keys(user_id);
+    CREATE INDEX IF NOT EXISTS idx_properties_city_state ON properties(city, state);
 ''')
 
 conn.commit()
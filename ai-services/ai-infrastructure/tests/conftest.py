@@ -0,0 +1,53 @@
+"""
+Shared pytest configuration for the ai-infrastructure scripts.
+
+The data generator and training script are standalone scripts rather than
+an installed package, so their directories are put on the import path
+here. The pilot module is written to live in a service package next to
+its ``core`` config, logging and exceptions modules; ``pilot_module``
+imports it inside a minimal host package that provides them.
+"""
+
+import importlib
+import logging
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+for directory in ("data", "training/scripts"):
+    path = str(ROOT / directory)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+class _TestSettings:
+    """Settings the pilot module reads; no email provider is configured."""
+    JWT_SECRET = "test-secret"
+
+
+class ValidationError(Exception):
+    """Stand-in for the host package's ValidationError."""
+
+
+def _host_module(name: str, path=None, **attrs) -> types.ModuleType:
+    module = types.ModuleType(name)
+    if path is not None:
+        module.__path__ = [str(path)]
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    return module
+
+
+@pytest.fixture(scope="session")
+def pilot_module():
+    """Import pilot/customer_onboarding.py inside a host package."""
+    _host_module("pilot_host", ROOT)
+    _host_module("pilot_host.core", ROOT / "core")
+    _host_module("pilot_host.core.config", get_settings=_TestSettings)
+    _host_module("pilot_host.core.logging", get_logger=logging.getLogger)
+    _host_module("pilot_host.core.exceptions", ValidationError=ValidationError)
+    return importlib.import_module("pilot_host.pilot.customer_onboarding")
@@ -0,0 +1,227 @@
+"""
+Test Suite for the Customer Pilot Program
+
+Covers queued usage tracking and the counters derived from it.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def manager(pilot_module):
+    """Create an empty pilot customer manager."""
+    return pilot_module.PilotCustomerManager()
+
+
+@pytest.fixture
+def register(pilot_module, manager):
+    """Register a startup-tier customer with a unique email."""
+    async def _register(i: int = 0):
+        return await manager.register_customer(pilot_module.CustomerRegistration(
+            company_name=f"Company {i}",
+            contact_name="Pat Doe",
+            email=f"contact{i}@example.com",
+            phone="+1-555-0100",
+            company_size="1-10",
+            industry="real estate",
+            use_case="valuation",
+            expected_volume="10000"
+        ))
+    return _register
+
+
+def _metric(pilot_module, customer_id: str, timestamp: datetime):
+    return pilot_module.UsageMetric(
+        customer_id=customer_id,
+        endpoint="/v1/valuation",
+        timestamp=timestamp,
+        response_time=0.12,
+        status_code=200
+    )
+
+
+class TestTrackApiUsage:
+    """Test suite for queued API usage tracking."""
+
+    @pytest.mark.asyncio
+    async def test_usage_applied_on_flush(self, pilot_module, manager, register):
+        """Tracking only enqueues; flush_usage applies every queued metric."""
+        customer = await register()
+        now = datetime.utcnow()
+
+        for _ in range(5):
+            await manager.track_api_usage(_metric(pilot_module, customer.customer_id, now))
+        assert manager._usage_queue.qsize() == 5
+        assert manager.pilot_metrics["total_api_calls"] == 0
+
+        await manager.flush_usage()
+
+        assert manager._usage_queue.qsize() == 0
+        assert manager.pilot_metrics["total_api_calls"] == 5
+        assert manager._month_usage(customer.customer_id, pilot_module._month_ord(now)) == 5
+        dashboard = await manager.get_customer_dashboard(customer.customer_id)
+        assert dashboard["usage_metrics"]["monthly_calls"] == 5
+        assert dashboard["usage_metrics"]["recent_calls"] == 5
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_profile_current_usage(self, pilot_module, manager, register):
+        """Reading a profile fills current_usage from the usage matrix."""
+        customer = await register()
+        now = datetime.utcnow()
+
+        for timestamp in (now, now, now - timedelta(days=1)):
+            await manager.track_api_usage(_metric(pilot_module, customer.customer_id, timestamp))
+        await manager.flush_usage()
+
+        profile = await manager.get_customer(customer.customer_id)
+        same_month = (now - timedelta(days=1)).month == now.month
+        assert profile.current_usage == {"daily_calls": 2, "monthly_calls": 3 if same_month else 2}
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_first_call_milestone(self, pilot_module, manager, register):
+        """The first applied call completes the milestone and moves to testing."""
+        customer = await register()
+
+        await manager.track_api_usage(_metric(pilot_module, customer.customer_id, datetime.utcnow()))
+        await manager.flush_usage()
+
+        assert customer.status == pilot_module.OnboardingStatus.TESTING
+        assert customer.integration_flags & pilot_module.IntegrationFlag.FIRST_CALL
+        assert manager._status_counts[pilot_module.OnboardingStatus.TESTING] == 1
+        assert manager._status_counts[pilot_module.OnboardingStatus.REGISTERED] == 0
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_usage_counted_per_day_and_customer(self, pilot_module, manager, register):
+        """Calls land in their own customer row and day column."""
+        first, second = await register(1), await register(2)
+        now = datetime.utcnow()
+        yesterday = now - timedelta(days=1)
+
+        for customer_id, timestamp in [(first.customer_id, now), (first.customer_id, yesterday),
+                                       (second.customer_id, now)]:
+            await manager.track_api_usage(_metric(pilot_module, customer_id, timestamp))
+        await manager.flush_usage()
+
+        today = manager._day_index(now.date())
+        first_row = manager._usage[manager._cust_idx[first.customer_id]]
+        assert first_row[today] == 1
+        assert first_row[today - 1] == 1
+        assert manager._usage[manager._cust_idx[second.customer_id], today] == 1
+        assert manager._daily_totals[today] == 2
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_unknown_customer_ignored(self, pilot_module, manager, register):
+        """Metrics for unknown customers are dropped without stalling the queue."""
+        customer = await register()
+        now = datetime.utcnow()
+
+        await manager.track_api_usage(_metric(pilot_module, "cust_missing", now))
+        await manager.track_api_usage(_metric(pilot_module, customer.customer_id, now))
+        await asyncio.wait_for(manager.flush_usage(), timeout=5)
+
+        assert manager.pilot_metrics["total_api_calls"] == 1
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_future_usage_ignored(self, pilot_module, manager, register):
+        """A far-future timestamp is dropped instead of growing the usage matrix."""
+        customer = await register()
+        now = datetime.utcnow()
+        manager._ensure_usage_capacity(0, manager._day_index(now.date()) + 2)
+        shape, totals = manager._usage.shape, len(manager._daily_totals)
+
+        await manager.track_api_usage(_metric(pilot_module, customer.customer_id, now + timedelta(days=3650)))
+        await manager.track_api_usage(_metric(pilot_module, customer.customer_id, now + timedelta(days=1)))
+        await manager.flush_usage()
+
+        assert manager._usage.shape == shape
+        assert len(manager._daily_totals) == totals
+        # A day ahead is tolerated as clock skew
+        assert manager.pilot_metrics["total_api_calls"] == 1
+        assert manager._daily_totals[manager._day_index(now.date()) + 1] == 1
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_close_applies_pending_usage(self, pilot_module, manager, register):
+        """Closing the manager applies queued usage and stops the drain task."""
+        customer = await register()
+
+        await manager.track_api_usage(_metric(pilot_module, customer.customer_id, datetime.utcnow()))
+        await manager.close()
+
+        assert manager.pilot_metrics["total_api_calls"] == 1
+        assert manager._drain_task is None
+
+
+class TestFeedback:
+    """Test suite for feedback ratings."""
+
+    @pytest.mark.asyncio
+    async def test_average_ratings(self, pilot_module, manager, register):
+        """Per-customer and pilot-wide averages derive from the rating columns."""
+        first, second = await register(1), await register(2)
+
+        for customer, rating in [(first, 5), (first, 2), (second, 4)]:
+            await manager.collect_feedback(pilot_module.CustomerFeedback(
+                customer_id=customer.customer_id, rating=rating, category="api", comments="ok"
+            ))
+
+        dashboard = await manager.get_customer_dashboard(first.customer_id)
+        assert dashboard["feedback"]["average_rating"] == pytest.approx(3.5)
+        assert manager.pilot_metrics["average_rating"] == pytest.approx(11 / 3)
+        # The 2-star rating opened a support ticket
+        assert dashboard["support"]["open_tickets"] == 1
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_profile_metrics(self, pilot_module, manager, register):
+        """The profile returned by get_customer carries its running rating."""
+        customer = await register(1)
+
+        for rating in (5, 4, 4):
+            await manager.collect_feedback(pilot_module.CustomerFeedback(
+                customer_id=customer.customer_id, rating=rating, category="api", comments="ok"
+            ))
+
+        profile = await manager.get_customer(customer.customer_id)
+        assert profile.metrics["rating_sum"] == 13
+        assert profile.metrics["rating_count"] == 3
+        assert profile.metrics["average_rating"] == pytest.approx(13 / 3)
+        await manager.close()
+
+
+class TestDashboard:
+    """Test suite for the customer dashboard."""
+
+    @pytest.mark.asyncio
+    async def test_recommendations_follow_pilot_day(self, manager, register):
+        """The cached advice refreshes when the pilot day rolls over mid-day."""
+        customer = await register()
+        customer.created_at = datetime.utcnow() - timedelta(days=25, hours=1)
+        ending = "Your pilot is ending soon. Schedule a review call"
+
+        assert ending not in (await manager.get_customer_dashboard(customer.customer_id))["recommendations"]
+
+        # Same calendar day, but the customer's 26th pilot day has started
+        customer.created_at -= timedelta(days=1)
+        assert ending in (await manager.get_customer_dashboard(customer.customer_id))["recommendations"]
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_recommendations_are_copies(self, manager, register):
+        """Mutating a returned list does not change the cached advice."""
+        customer = await register()
+
+        first = (await manager.get_customer_dashboard(customer.customer_id))["recommendations"]
+        expected = list(first)
+        first.append("tampered")
+
+        assert (await manager.get_customer_dashboard(customer.customer_id))["recommendations"] == expected
+        await manager.close()
@@ -0,0 +1,109 @@
+"""
+Test Suite for the Synthetic Property Data Generator
+
+Pins the generated column set, which the training script and the
+generated predictor consume, and checks columnar, seeded generation.
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from synthetic_data_generator import (
+    PROPERTY_FEATURES,
+    IMAGE_URL_TEMPLATE,
+    PropertyDataGenerator,
+    expand_features,
+    expand_images
+)
+
+EXPECTED_COLUMNS = [
+    "id", "property_type", "address", "neighborhood", "city", "state",
+    "latitude", "longitude", "bedrooms", "bathrooms", "square_feet",
+    "lot_size", "year_built", "price", "price_per_sqft",
+    *(f"has_{feature}" for feature in PROPERTY_FEATURES),
+    "features_packed", "description", "num_images", "list_date",
+    "days_on_market", "status", "source", "created_at", "updated_at"
+]
+
+
+class TestPropertyDataGenerator:
+    """Test suite for PropertyDataGenerator."""
+
+    @pytest.fixture
+    def dataset(self):
+        """Generate a small seeded dataset."""
+        return PropertyDataGenerator(num_records=500, seed=7).generate_dataset()
+
+    def test_column_set(self, dataset):
+        """The schema consumed by training is exactly the pinned column list."""
+        assert list(dataset.columns) == EXPECTED_COLUMNS
+        assert len(dataset) == 500
+
+    def test_training_vocabulary_matches(self):
+        """The trainer's copy of the amenity vocabulary matches the generator's."""
+        from train_property_valuation import PROPERTY_FEATURES as TRAINING_FEATURES
+
+        assert list(TRAINING_FEATURES) == PROPERTY_FEATURES
+
+    def test_feature_columns_agree_with_bitmask(self, dataset):
+        """Every has_<feature> column matches its bit in features_packed."""
+        features = expand_features(dataset)
+        for i, feature in enumerate(PROPERTY_FEATURES):
+            assert dataset[f"has_{feature}"].dtype == bool
+            bit_set = (dataset["features_packed"].to_numpy() >> i) & 1
+            np.testing.assert_array_equal(dataset[f"has_{feature}"].to_numpy(), bit_set.astype(bool))
+            np.testing.assert_array_equal(
+                dataset[f"has_{feature}"].to_numpy(), features.map(lambda names: feature in names).to_numpy()
+            )
+
+    def test_feature_counts_within_type_bounds(self, dataset):
+        """Each property gets a per-type number of distinct features."""
+        counts = dataset.filter(like="has_").sum(axis=1)
+        assert counts.min() >= 3
+        assert counts.max() <= 15
+        villas = dataset["property_type"] == "villa"
+        assert (counts[villas] >= 8).all()
+
+    def test_images_stored_as_count(self, dataset):
+        """Image URLs are rebuilt from num_images rather than stored per row."""
+        assert "images" not in dataset.columns
+        assert dataset["num_images"].between(5, 20).all()
+
+        images = expand_images(dataset.head(3))
+        for (_, row), urls in zip(dataset.head(3).iterrows(), images):
+            assert len(urls) == row["num_images"]
+            assert urls[0] == IMAGE_URL_TEMPLATE.format(pid=row["id"], i=1)
+
+    def test_columnar_dtypes(self, dataset):
+        """Low-cardinality strings are categoricals and numbers use narrow dtypes."""
+        for column in ("property_type", "neighborhood", "city", "state", "status", "source"):
+            assert isinstance(dataset[column].dtype, pd.CategoricalDtype)
+        assert dataset["bedrooms"].dtype == np.int8
+        assert dataset["year_built"].dtype == np.int16
+        assert dataset["price"].dtype == np.float32
+
+    def test_lot_size_only_for_lot_types(self, dataset):
+        """Only houses and villas have a lot size."""
+        has_lot = dataset["property_type"].isin(["house", "villa"])
+        assert dataset.loc[has_lot, "lot_size"].notna().all()
+        assert dataset.loc[~has_lot, "lot_size"].isna().all()
+
+    def test_seeded_generation_is_reproducible(self):
+        """The same seed yields the same records (apart from timestamps)."""
+        timestamps = ["list_date", "created_at", "updated_at"]
+        first = PropertyDataGenerator(num_records=200, seed=11).generate_dataset().drop(columns=timestamps)
+        second = PropertyDataGenerator(num_records=200, seed=11).generate_dataset().drop(columns=timestamps)
+        other = PropertyDataGenerator(num_records=200, seed=12).generate_dataset().drop(columns=timestamps)
+
+        pd.testing.assert_frame_equal(first, second)
+        assert not first["price"].equals(other["price"])
+
+    def test_parallel_generation_is_reproducible(self):
+        """Parallel generation is deterministic for a fixed seed and worker count."""
+        timestamps = ["list_date", "created_at", "updated_at"]
+        first = PropertyDataGenerator(num_records=300, seed=5).generate_dataset_parallel(workers=2)
+        second = PropertyDataGenerator(num_records=300, seed=5).generate_dataset_parallel(workers=2)
+
+        assert len(first) == 300
+        pd.testing.assert_frame_equal(first.drop(columns=timestamps), second.drop(columns=timestamps))
@@ -0,0 +1,143 @@
+"""
+Test Suite for Property Valuation Training
+
+Checks that the trainer consumes the generator's dataset schema and that
+the predictor it writes serves the trained model end to end.
+"""
+
+import importlib.util
+
+import lightgbm as lgb
+import pytest
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.dummy import DummyRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import train_test_split
+
+from synthetic_data_generator import PROPERTY_FEATURES, PropertyDataGenerator, expand_features
+from train_property_valuation import EarlyStoppingRegressor, PropertyValuationTrainer
+
+
+@pytest.fixture
+def dataset():
+    """Generate a small seeded dataset."""
+    return PropertyDataGenerator(num_records=600, seed=3).generate_dataset()
+
+
+@pytest.fixture
+def trainer(tmp_path, monkeypatch):
+    """Create a trainer whose MLflow store and artifacts live in a temp dir."""
+    monkeypatch.chdir(tmp_path)
+    return PropertyValuationTrainer(str(tmp_path / "properties.parquet"), str(tmp_path / "model"))
+
+
+class TestPreprocessData:
+    """Test suite for PropertyValuationTrainer.preprocess_data."""
+
+    def test_flag_columns_from_dataset(self, trainer, dataset):
+        """Every has_<feature> column is kept as a 0/1 training feature."""
+        X, y = trainer.preprocess_data(dataset)
+
+        flags = [f"has_{feature}" for feature in PROPERTY_FEATURES]
+        assert set(flags) <= set(X.columns)
+        assert (X[flags].dtypes == np.int8).all()
+        np.testing.assert_array_equal(X["num_features"], dataset[flags].sum(axis=1))
+        assert "features_packed" not in X.columns
+        assert "price_per_sqft" not in X.columns
+        assert y.name == "price"
+
+    def test_feature_list_schema_matches(self, trainer, dataset):
+        """Datasets with a features list per row yield the same training frame."""
+        flags = [f"has_{feature}" for feature in PROPERTY_FEATURES]
+        legacy = dataset.drop(columns=flags + ["features_packed"]).assign(features=expand_features(dataset))
+
+        X, _ = trainer.preprocess_data(dataset)
+        X_legacy, _ = trainer.preprocess_data(legacy)
+
+        pd.testing.assert_frame_equal(X_legacy[X.columns], X, check_dtype=False)
+
+
+class TestEarlyStoppingRegressor:
+    """Test suite for the early-stopped booster wrapper."""
+
+    @pytest.mark.parametrize("booster", [
+        xgb.XGBRegressor(n_estimators=2000, learning_rate=0.3, random_state=0),
+        lgb.LGBMRegressor(n_estimators=2000, learning_rate=0.3, random_state=0, verbose=-1),
+    ], ids=["xgboost", "lightgbm"])
+    def test_stops_before_max_rounds(self, booster):
+        """The tree count comes from a held-out slice of the training rows."""
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(400, 5))
+        y = X[:, 0] + rng.normal(scale=0.5, size=400)
+
+        model = EarlyStoppingRegressor(booster, early_stopping_rounds=20).fit(X, y)
+
+        best_iteration = getattr(model.estimator_, "best_iteration_", None) or model.estimator_.best_iteration
+        assert best_iteration < 200
+        assert model.estimator_ is not booster
+        np.testing.assert_array_equal(model.predict(X), model.estimator_.predict(X))
+
+
+class TestBlendTopTwo:
+    """Test suite for the top-2 blend."""
+
+    def test_scores_on_held_out_rows(self, trainer):
+        """Blend and best single model are scored on the same held-out half."""
+        rng = np.random.default_rng(0)
+        X = pd.DataFrame({"x": rng.normal(size=200)})
+        y = pd.Series(100 + 10 * X["x"] + rng.normal(size=200))
+        trainer.models = {
+            "good": LinearRegression().fit(X, y),
+            "constant": DummyRegressor().fit(X, y),
+        }
+
+        ensemble, ensemble_score, single_score = trainer.blend_top_two(
+            {"good": 1.0, "constant": 9.0}, X, y
+        )
+
+        _, X_holdout, _, y_holdout = train_test_split(X, y, test_size=0.5, random_state=42)
+        expected = mean_absolute_error(y_holdout, trainer.models["good"].predict(X_holdout))
+        assert single_score == pytest.approx(expected * 100 / y_holdout.mean())
+        assert ensemble_score == pytest.approx(
+            mean_absolute_error(y_holdout, ensemble.predict(X_holdout)) * 100 / y_holdout.mean()
+        )
+        assert list(ensemble.named_estimators_) == ["good", "constant"]
+
+    def test_needs_two_models(self, trainer):
+        """With one trained model there is nothing to blend."""
+        assert trainer.blend_top_two({"only": 1.0}, None, None) == (None, float("inf"), float("inf"))
+
+
+class TestRoundTrip:
+    """Generate a dataset, train on it and predict with the written predictor."""
+
+    def test_generate_train_predict(self, trainer, dataset):
+        """The written predictor reproduces the trained model on generated rows."""
+        dataset.to_parquet(trainer.data_path, index=False)
+        trainer.train()
+
+        spec = importlib.util.spec_from_file_location("predict", trainer.model_dir / "predict.py")
+        predict = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(predict)
+        predictor = predict.PropertyValuationPredictor(
+            str(trainer.model_dir / "property_valuation_model.joblib")
+        )
+
+        properties = dataset.head(25).drop(columns=["price"])
+        predictions = np.asarray(predictor.predict(properties)["predictions"])
+
+        assert predictions.shape == (25,)
+        assert np.isfinite(predictions).all()
+        assert (predictions >= 0).all()
+        X, _ = trainer.preprocess_data(dataset.head(25))
+        np.testing.assert_allclose(predictions, np.clip(trainer.best_model.predict(X), 0, None), rtol=1e-5)
+
+        # Callers may pass a features list instead of the has_<feature> columns
+        flags = [f"has_{feature}" for feature in PROPERTY_FEATURES]
+        legacy = properties.drop(columns=flags + ["features_packed"]).assign(
+            features=expand_features(properties)
+        )
+        np.testing.assert_allclose(predictor.predict(legacy)["predictions"], predictions)
@@ -4,13 +4,20 @@ Lightweight configuration for local development without Docker
 """
 
 import os
+from functools import lru_cache
 from typing import Optional
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     """Application settings for native deployment."""
 
+    model_config = SettingsConfigDict(
+        env_file=".env.native",
+        case_sensitive=True,
+        frozen=True
+    )
+
     # Basic Settings
     ENVIRONMENT: str = "native"
     DEBUG: bool = True
@@ -86,10 +93,8 @@ class Settings(BaseSettings):
         """Sync database URL for SQLAlchemy."""
         return self.DATABASE_URL.replace("sqlite+aiosqlite://", "sqlite:///")
 
-    class Config:
-        env_file = ".env.native"
-        case_sensitive = True
-
 
-# Create global settings instance
-settings = Settings()
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the settings, reading the environment and .env.native once."""
+    return Settings()
\ No newline at end of file
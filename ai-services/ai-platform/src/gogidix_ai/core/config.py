@@ -1,16 +1,15 @@
-from pydantic_settings import BaseSettings
+from functools import lru_cache
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_file=".env.native", case_sensitive=True, frozen=True)
+
     ENVIRONMENT: str = "native"
     DEBUG: bool = True
     VERSION: str = "1.0.0"
     PROJECT_NAME: str = "Gogidix AI Services"
 
-    class Config:
-        env_file = ".env.native"
-
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
-    return Settings()
-
-# Create global instance
-settings = Settings()
\ No newline at end of file
+    return Settings()
\ No newline at end of file
@@ -1,6 +1,7 @@
 from fastapi import FastAPI
-from src.gogidix_ai.core.config import settings
+from src.gogidix_ai.core.config import get_settings
 
+settings = get_settings()
 app = FastAPI(title=settings.PROJECT_NAME)
 
 @app.get("/health")
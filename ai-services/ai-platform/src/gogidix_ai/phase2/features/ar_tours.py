@@ -10,8 +10,12 @@ Implements augmented and virtual reality property tours with:
 """
 
 import asyncio
+import functools
 import json
 import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
@@ -19,13 +23,51 @@ import uuid
 
 import cv2
 import numpy as np
-from PIL import Image, ImageEnhance
 import trimesh
 from pyntcloud import PyntCloud
 import plotly.graph_objects as go
 import plotly.express as px
 from fastapi import HTTPException, status
 from pydantic import BaseModel, Field
+from scipy.optimize import least_squares
+from scipy.sparse import lil_matrix
+
+# Optional: Open3D Poisson reconstruction replaces PyntCloud meshing
+try:
+    import open3d as o3d
+    OPEN3D_AVAILABLE = True
+except ImportError:
+    OPEN3D_AVAILABLE = False
+
+# Optional: MeshLib fills holes and relaxes the mesh in one native pass
+try:
+    from meshlib import mrmeshnumpy, mrmeshpy
+    MESHLIB_AVAILABLE = True
+except ImportError:
+    MESHLIB_AVAILABLE = False
+
+# Optional: orjson writes the tour metadata and handles numpy values natively
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Optional: pyrender keeps one offscreen GL context for thumbnails; EGL lets
+# it run headless
+os.environ.setdefault("PYOPENGL_PLATFORM", "egl")
+try:
+    import pyrender
+    PYRENDER_AVAILABLE = True
+except ImportError:
+    PYRENDER_AVAILABLE = False
+
+# Optional: numba compiles the per-point colour sampling loop
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
 from ..core.config import get_settings
 from ..core.logging import get_logger
@@ -35,6 +77,70 @@ logger = get_logger(__name__)
 settings = get_settings()
 
 
+def _sample_colors(points_3d: np.ndarray, projections: np.ndarray,
+                   images: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+    """Bilinearly sample an RGB colour for each point from the first camera that sees it.
+
+    ``projections`` are (C, 3, 4) camera matrices, ``images`` a (C, H, W, 3)
+    BGR stack padded to the largest image and ``sizes`` the real (h, w) of
+    each. Points no camera sees stay black.
+    """
+    n = len(points_3d)
+    proj = np.einsum("cij,nj->cni", projections, np.hstack([points_3d, np.ones((n, 1))]))
+    depth = proj[..., 2]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        u = proj[..., 0] / depth
+        v = proj[..., 1] / depth
+    visible = ((depth > 0) & (u >= 0) & (v >= 0)
+               & (u <= sizes[:, 1:2] - 1) & (v <= sizes[:, 0:1] - 1))
+
+    colors = np.zeros((n, 3), dtype=np.uint8)
+    cam = visible.argmax(axis=0)
+    idx = np.flatnonzero(visible[cam, np.arange(n)])
+    cam = cam[idx]
+    u, v = u[cam, idx], v[cam, idx]
+
+    u0, v0 = np.floor(u).astype(np.intp), np.floor(v).astype(np.intp)
+    u1 = np.minimum(u0 + 1, sizes[cam, 1] - 1)
+    v1 = np.minimum(v0 + 1, sizes[cam, 0] - 1)
+    du, dv = (u - u0)[:, None], (v - v0)[:, None]
+    value = (images[cam, v0, u0] * (1 - du) * (1 - dv) + images[cam, v0, u1] * du * (1 - dv)
+             + images[cam, v1, u0] * (1 - du) * dv + images[cam, v1, u1] * du * dv)
+    colors[idx] = (value[:, ::-1] + 0.5).astype(np.uint8)
+    return colors
+
+
+if NUMBA_AVAILABLE:
+    @numba.njit(parallel=True, fastmath=True)
+    def _sample_colors(points_3d, projections, images, sizes):
+        n = points_3d.shape[0]
+        colors = np.zeros((n, 3), dtype=np.uint8)
+        for i in numba.prange(n):
+            x, y, z = points_3d[i, 0], points_3d[i, 1], points_3d[i, 2]
+            for cam in range(projections.shape[0]):
+                P = projections[cam]
+                depth = P[2, 0] * x + P[2, 1] * y + P[2, 2] * z + P[2, 3]
+                if depth <= 0:
+                    continue
+                u = (P[0, 0] * x + P[0, 1] * y + P[0, 2] * z + P[0, 3]) / depth
+                v = (P[1, 0] * x + P[1, 1] * y + P[1, 2] * z + P[1, 3]) / depth
+                h, w = sizes[cam, 0], sizes[cam, 1]
+                if u < 0 or v < 0 or u > w - 1 or v > h - 1:
+                    continue
+
+                u0, v0 = int(u), int(v)
+                u1, v1 = min(u0 + 1, w - 1), min(v0 + 1, h - 1)
+                du, dv = u - u0, v - v0
+                for c in range(3):
+                    value = (images[cam, v0, u0, c] * (1 - du) * (1 - dv)
+                             + images[cam, v0, u1, c] * du * (1 - dv)
+                             + images[cam, v1, u0, c] * (1 - du) * dv
+                             + images[cam, v1, u1, c] * du * dv)
+                    colors[i, 2 - c] = np.uint8(value + 0.5)
+                break
+        return colors
+
+
 class ARPointOfInterest(BaseModel):
     """AR point of interest in property tour."""
     id: str = Field(..., description="Unique identifier")
@@ -74,10 +180,55 @@ class ARTourModel(BaseModel):
 class ARVirtualStaging:
     """Virtual staging for empty properties."""
 
+    # Furniture staged per room type
+    FURNITURE_BY_ROOM = {
+        "living_room": ("sofa", "table", "chair"),
+        "bedroom": ("bed", "chair", "table"),
+        "dining_room": ("table", "chair"),
+        "office": ("table", "chair")
+    }
+
     def __init__(self):
         # Load furniture models database
         self.furniture_models = self._load_furniture_models()
 
+        # Parse each available furniture mesh once; staging copies from here
+        self._mesh_cache = {
+            (style, item): trimesh.load(path)
+            for style, items in self.furniture_models.items()
+            for item, path in items.items()
+            if Path(path).exists()
+        }
+
+        # Placement rule per item as (centroid weights, min-bound weights, offset):
+        # position = centroid * cw + bounds[0] * bw + offset, on the floor (z=0)
+        along_wall = (np.array([1.0, 0.0, 0.0]), np.array([0.0, 1.0, 0.0]))
+        centered = (np.array([1.0, 1.0, 0.0]), np.zeros(3))
+        self._placements = {
+            "sofa": (*along_wall, np.array([0.0, 1.0, 0.0])),    # against longest wall
+            "table": (*centered, np.zeros(3)),                   # in center
+            "bed": (*along_wall, np.array([0.0, 0.5, 0.0])),     # against wall
+            "chair": (*centered, np.array([1.5, 0.0, 0.0]))      # near table
+        }
+
+        # Meshes and stacked placement rules per (room type, style), resolved
+        # once and reused by every staging call
+        self._staging_plan = functools.lru_cache(maxsize=32)(self._build_staging_plan)
+
+    def _build_staging_plan(self, room_type: str, style: str
+                            ) -> Tuple[List[trimesh.Trimesh], np.ndarray, np.ndarray, np.ndarray]:
+        """Available furniture meshes for a room and their (k, 3) placement rules."""
+        items = [
+            item for item in self.FURNITURE_BY_ROOM.get(room_type, ())
+            if (style, item) in self._mesh_cache
+        ]
+        # Items without a rule go to the room centroid
+        rules = [self._placements.get(item, (np.ones(3), np.zeros(3), np.zeros(3))) for item in items]
+        centroid_weights, bound_weights, offsets = (
+            np.array([rule[i] for rule in rules]).reshape(-1, 3) for i in range(3)
+        )
+        return [self._mesh_cache[(style, item)] for item in items], centroid_weights, bound_weights, offsets
+
     def _load_furniture_models(self) -> Dict[str, Any]:
         """Load virtual furniture models by style."""
         return {
@@ -107,64 +258,60 @@ class ARVirtualStaging:
         logger.info(f"Virtual staging {room_type} with {style} style")
 
         # Get furniture for room type and style
-        furniture_map = {
-            "living_room": ["sofa", "table", "chair"],
-            "bedroom": ["bed", "chair", "table"],
-            "dining_room": ["table", "chair"],
-            "office": ["table", "chair"]
-        }
-
-        furniture_items = furniture_map.get(room_type, [])
-        styled_room = room_mesh.copy()
-
-        # Place furniture in room
-        for item in furniture_items:
-            furniture_path = self.furniture_models[style].get(item)
-            if furniture_path and Path(furniture_path).exists():
-                furniture_mesh = trimesh.load(furniture_path)
-
-                # Calculate placement position
-                position = self._calculate_furniture_placement(
-                    styled_room, item, room_type
-                )
-
-                # Place furniture
-                furniture_mesh.apply_translation(position)
-                styled_room = styled_room.union(furniture_mesh)
-
-        return styled_room
+        meshes, centroid_weights, bound_weights, offsets = self._staging_plan(room_type, style)
 
-    def _calculate_furniture_placement(self, room_mesh: trimesh.Trimesh,
-                                     item: str, room_type: str) -> np.ndarray:
-        """Calculate optimal placement for furniture item."""
-        # Get room bounds
-        bounds = room_mesh.bounds
-        room_center = room_mesh.centroid
+        # Simplified placement logic, for all pieces at once
+        positions = room_mesh.centroid * centroid_weights + room_mesh.bounds[0] * bound_weights + offsets
 
-        # Simplified placement logic
-        if item == "sofa":
-            # Place sofa against longest wall
-            return np.array([room_center[0], bounds[0][1] + 1.0, 0])
-        elif item == "table":
-            # Place table in center
-            return np.array([room_center[0], room_center[1], 0])
-        elif item == "bed":
-            # Place bed against wall
-            return np.array([room_center[0], bounds[0][1] + 0.5, 0])
-        elif item == "chair":
-            # Place chair near table
-            return np.array([room_center[0] + 1.5, room_center[1], 0])
+        # Place furniture in room; pieces are appended rather than CSG-unioned,
+        # since staging only needs them rendered together
+        parts = [room_mesh.copy()]
+        for cached_mesh, position in zip(meshes, positions):
+            furniture_mesh = cached_mesh.copy()
+            furniture_mesh.apply_translation(position)
+            parts.append(furniture_mesh)
 
-        return room_center
+        return trimesh.util.concatenate(parts)
 
 
 class ThreeDModelGenerator:
     """Generates 3D models from 2D images."""
 
-    def __init__(self):
+    def __init__(self, root_sift: bool = False, batch_extractor: Optional[Any] = None):
         self.depth_estimator = self._init_depth_estimator()
         self.staging = ARVirtualStaging()
 
+        # Optional batched (e.g. CUDA SIFT) extractor exposing
+        # extract_batch(images) -> [(keypoints, descriptors), ...]; the CPU
+        # detector below is the fallback
+        self.batch_extractor = batch_extractor
+
+        # Detection and matching run in worker threads (OpenCV releases the
+        # GIL); neither the SIFT detector nor the FLANN matcher is thread-safe,
+        # so each worker thread creates one and reuses it for every frame/pair.
+        # RootSIFT (L1-normalise then sqrt) optionally makes L2 matching behave
+        # like the Hellinger kernel
+        self._local = threading.local()
+        self.root_sift = root_sift
+        self.ratio_threshold = 0.75
+
+        # Longest image side fed to SfM; SIFT cost grows with pixel count
+        self.max_sfm_side = 1600
+
+    @property
+    def sift(self):
+        """SIFT detector owned by the calling thread."""
+        if not hasattr(self._local, "sift"):
+            self._local.sift = cv2.SIFT_create()
+        return self._local.sift
+
+    @property
+    def matcher(self):
+        """KD-tree FLANN matcher owned by the calling thread."""
+        if not hasattr(self._local, "matcher"):
+            self._local.matcher = cv2.FlannBasedMatcher(dict(algorithm=1, trees=5), dict(checks=50))
+        return self._local.matcher
+
     def _init_depth_estimator(self):
         """Initialize depth estimation model."""
         # In production, use MiDaS or similar depth estimation
@@ -176,52 +323,294 @@ class ThreeDModelGenerator:
         """Generate 3D mesh from room images."""
         logger.info(f"Generating 3D mesh for {room_type} from {len(images)} images")
 
-        # Structure from Motion (SfM) pipeline
-        points_3d, colors = await self._sfm_reconstruction(images)
-
-        # Create point cloud
-        cloud = PyntCloud.from_array(points_3d)
+        # Structure from Motion (SfM) pipeline. Intrinsics are derived from the
+        # (downscaled) image size, so the reconstruction needs no rescaling
+        points_3d, colors = await self._sfm_reconstruction(self._downscale(images))
 
         # Mesh reconstruction
-        mesh = cloud.to_mesh()
+        if OPEN3D_AVAILABLE:
+            mesh = self._poisson_mesh(points_3d, colors)
+        else:
+            cloud = PyntCloud.from_array(points_3d)
+            mesh = cloud.to_mesh()
 
         # Clean and optimize mesh
         mesh = self._clean_mesh(mesh)
 
         return mesh
 
+    @staticmethod
+    def _poisson_mesh(points_3d: np.ndarray, colors: np.ndarray,
+                      depth: int = 9) -> trimesh.Trimesh:
+        """Watertight surface from the SfM point cloud via Open3D Poisson reconstruction."""
+        pcd = o3d.geometry.PointCloud()
+        pcd.points = o3d.utility.Vector3dVector(points_3d)
+        pcd.colors = o3d.utility.Vector3dVector(np.asarray(colors, dtype=np.float64) / 255.0)
+        pcd.estimate_normals()
+
+        o3d_mesh, _ = o3d.geometry.TriangleMesh.create_from_point_cloud_poisson(pcd, depth=depth)
+        return trimesh.Trimesh(
+            vertices=np.asarray(o3d_mesh.vertices),
+            faces=np.asarray(o3d_mesh.triangles),
+            vertex_colors=np.asarray(o3d_mesh.vertex_colors),
+        )
+
+    def _downscale(self, images: List[np.ndarray]) -> List[np.ndarray]:
+        """Shrink all images by one common factor so the longest side fits max_sfm_side."""
+        scale = min(1.0, self.max_sfm_side / max(max(img.shape[:2]) for img in images))
+        if scale == 1.0:
+            return images
+
+        return [
+            cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            for img in images
+        ]
+
+    def _detect_one(self, img: np.ndarray) -> Tuple[Any, Optional[np.ndarray]]:
+        """Detect keypoints and descriptors in one image (runs in a worker thread)."""
+        return self.sift.detectAndCompute(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), None)
+
+    async def _extract_features(self, images: List[np.ndarray]) -> Tuple[List[Any], List[Optional[np.ndarray]]]:
+        """Detect keypoints and descriptors for a whole image batch."""
+        if self.batch_extractor is not None:
+            features = await asyncio.to_thread(self.batch_extractor.extract_batch, images)
+        else:
+            features = await asyncio.gather(
+                *(asyncio.to_thread(self._detect_one, img) for img in images)
+            )
+
+        keypoints_list = [kp for kp, _ in features]
+        descriptors_list = [
+            self._root_sift(desc) if self.root_sift and desc is not None else desc
+            for _, desc in features
+        ]
+        return keypoints_list, descriptors_list
+
     async def _sfm_reconstruction(self, images: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
         """Perform Structure from Motion reconstruction."""
         # Extract features
-        keypoints_list = []
-        descriptors_list = []
-
-        for img in images:
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            sift = cv2.SIFT_create()
-            kp, desc = sift.detectAndCompute(gray, None)
-            keypoints_list.append(kp)
-            descriptors_list.append(desc)
+        keypoints_list, descriptors_list = await self._extract_features(images)
 
         # Match features between images
-        matches = []
-        for i in range(len(images) - 1):
-            bf = cv2.BFMatcher()
-            matches.append(bf.match(descriptors_list[i], descriptors_list[i + 1]))
+        matches = await asyncio.gather(*(
+            asyncio.to_thread(self._match_pair, descriptors_list[i], descriptors_list[i + 1])
+            for i in range(len(images) - 1)
+        ))
 
         # Estimate camera poses (simplified)
-        poses = self._estimate_camera_poses(images, matches)
+        poses, inliers = self._estimate_camera_poses(images, keypoints_list, matches)
 
         # Triangulate 3D points
-        points_3d = self._triangulate_points(images, keypoints_list, matches, poses)
+        points_3d, observations = self._triangulate_points(
+            images, keypoints_list, matches, poses, inliers
+        )
+
+        # Jointly refine cameras and points (CPU-bound, so off the event loop)
+        points_3d, poses = await asyncio.to_thread(
+            self._bundle_adjust, points_3d, poses, observations, self._camera_matrix(images[0])
+        )
 
         # Extract colors
         colors = self._extract_colors(images, points_3d, poses)
 
         return points_3d, colors
 
+    @staticmethod
+    def _camera_matrix(image: np.ndarray) -> np.ndarray:
+        """Pinhole intrinsics guessed from the image size (photos are uncalibrated)."""
+        h, w = image.shape[:2]
+        focal = 1.2 * max(h, w)
+        return np.array([[focal, 0.0, w / 2], [0.0, focal, h / 2], [0.0, 0.0, 1.0]])
+
+    @staticmethod
+    def _matched_points(kp1: List[Any], kp2: List[Any],
+                        pair_matches: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+        """Pixel coordinates of both ends of every match, as two (N, 2) arrays."""
+        idx = np.array([(m.queryIdx, m.trainIdx) for m in pair_matches], dtype=np.intp).reshape(-1, 2)
+        return cv2.KeyPoint_convert(kp1)[idx[:, 0]], cv2.KeyPoint_convert(kp2)[idx[:, 1]]
+
+    def _estimate_camera_poses(self, images: List[np.ndarray], keypoints_list: List[Any],
+                               matches: List[List[Any]]
+                               ) -> Tuple[List[np.ndarray], List[Optional[np.ndarray]]]:
+        """Chain pairwise essential-matrix poses into world-to-camera [R|t] matrices.
+
+        The first camera defines the world frame. Translations are only known
+        up to scale. Also returns, per pair, a boolean mask of the matches that
+        are RANSAC and cheirality inliers; a pair with too few matches or no
+        essential matrix keeps the previous pose and gets None instead.
+        """
+        K = self._camera_matrix(images[0])
+        poses = [np.hstack([np.eye(3), np.zeros((3, 1))])]
+        inliers = []
+
+        for i, pair_matches in enumerate(matches):
+            prev = poses[-1]
+            if len(pair_matches) < 5:
+                poses.append(prev.copy())
+                inliers.append(None)
+                continue
+
+            pts1, pts2 = self._matched_points(keypoints_list[i], keypoints_list[i + 1], pair_matches)
+            E, mask = cv2.findEssentialMat(pts1, pts2, K, cv2.RANSAC, 0.999, 1.0)
+            if E is None:
+                poses.append(prev.copy())
+                inliers.append(None)
+                continue
+
+            # findEssentialMat may stack several candidate solutions; use the first
+            _, R, t, mask = cv2.recoverPose(E[:3], pts1, pts2, K, mask=mask)
+            poses.append(np.hstack([R @ prev[:, :3], R @ prev[:, 3:] + t]))
+            inliers.append(mask.ravel() > 0)
+
+        return poses, inliers
+
+    def _triangulate_points(self, images: List[np.ndarray], keypoints_list: List[Any],
+                            matches: List[List[Any]], poses: List[np.ndarray],
+                            inliers: List[Optional[np.ndarray]]
+                            ) -> Tuple[np.ndarray, Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Triangulate the inlier matches of each consecutive pair in one OpenCV call per pair.
+
+        Pairs without an inlier mask (their pose fell back to the previous
+        camera's, so there is no baseline) are skipped, and only points in
+        front of both cameras are kept. Also returns the observations used for
+        bundle adjustment as (camera index, point index, pixel) arrays, two
+        per point.
+        """
+        K = self._camera_matrix(images[0])
+        points = []
+        cam_idx, pixels = [], []
+
+        for i, (pair_matches, pair_inliers) in enumerate(zip(matches, inliers)):
+            if pair_inliers is None:
+                continue
+
+            pts1, pts2 = self._matched_points(keypoints_list[i], keypoints_list[i + 1], pair_matches)
+            pts1, pts2 = pts1[pair_inliers], pts2[pair_inliers]
+            pts4d = cv2.triangulatePoints(K @ poses[i], K @ poses[i + 1], pts1.T, pts2.T)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                pts3d = (pts4d[:3] / pts4d[3]).T
+
+            depth1 = pts3d @ poses[i][2, :3] + poses[i][2, 3]
+            depth2 = pts3d @ poses[i + 1][2, :3] + poses[i + 1][2, 3]
+            keep = np.isfinite(pts3d).all(axis=1) & (depth1 > 0) & (depth2 > 0)
+            points.append(pts3d[keep])
+            cam_idx.append(np.repeat([i, i + 1], int(keep.sum())))
+            pixels.append(np.vstack([pts1[keep], pts2[keep]]))
+
+        if not points:
+            empty = np.empty(0, dtype=np.intp)
+            return np.empty((0, 3)), (empty, empty, np.empty((0, 2)))
+
+        # Each point is seen by exactly the two cameras of its pair
+        offsets = np.cumsum([0] + [len(p) for p in points])
+        point_idx = np.concatenate([
+            np.tile(np.arange(start, stop), 2) for start, stop in zip(offsets[:-1], offsets[1:])
+        ])
+        return np.vstack(points), (np.concatenate(cam_idx), point_idx, np.vstack(pixels))
+
+    @staticmethod
+    def _rotate(points: np.ndarray, rot_vecs: np.ndarray) -> np.ndarray:
+        """Rotate each point by its own angle-axis vector (Rodrigues' formula)."""
+        theta = np.linalg.norm(rot_vecs, axis=1, keepdims=True)
+        with np.errstate(invalid="ignore"):
+            axis = np.nan_to_num(rot_vecs / theta)
+        cos, sin = np.cos(theta), np.sin(theta)
+        dot = np.sum(points * axis, axis=1, keepdims=True)
+        return cos * points + sin * np.cross(axis, points) + dot * (1 - cos) * axis
+
+    def _bundle_adjust(self, points_3d: np.ndarray, poses: List[np.ndarray],
+                       observations: Tuple[np.ndarray, np.ndarray, np.ndarray],
+                       K: np.ndarray) -> Tuple[np.ndarray, List[np.ndarray]]:
+        """Refine camera poses and 3D points by minimising reprojection error.
+
+        The first camera stays fixed as the world frame. Each observation only
+        depends on one camera and one point, so the Jacobian sparsity pattern is
+        handed to least_squares to keep the solve cheap. A soft-L1 loss (quadratic
+        up to about 1 px) keeps mismatched observations from dragging the solution.
+        """
+        cam_idx, point_idx, pixels = observations
+        n_cams, n_points = len(poses) - 1, len(points_3d)
+        if n_cams == 0 or n_points == 0:
+            return points_3d, poses
+
+        cam_params = np.array([
+            np.concatenate([cv2.Rodrigues(pose[:, :3])[0].ravel(), pose[:, 3]])
+            for pose in poses[1:]
+        ])
+        fixed = np.concatenate([np.zeros(3), poses[0][:, 3]])
+        n_cam_params = 6 * n_cams
+
+        def residuals(params: np.ndarray) -> np.ndarray:
+            cams = np.vstack([fixed, params[:n_cam_params].reshape(n_cams, 6)])[cam_idx]
+            pts = params[n_cam_params:].reshape(n_points, 3)[point_idx]
+            proj = self._rotate(pts, cams[:, :3]) + cams[:, 3:]
+            proj = proj[:, :2] / proj[:, 2:3]
+            return (proj * K[[0, 1], [0, 1]] + K[:2, 2] - pixels).ravel()
+
+        sparsity = lil_matrix((2 * len(cam_idx), n_cam_params + 3 * n_points), dtype=np.int8)
+        rows = np.arange(len(cam_idx))
+        moving = cam_idx > 0
+        for k in range(6):
+            sparsity[2 * rows[moving], 6 * (cam_idx[moving] - 1) + k] = 1
+            sparsity[2 * rows[moving] + 1, 6 * (cam_idx[moving] - 1) + k] = 1
+        for k in range(3):
+            sparsity[2 * rows, n_cam_params + 3 * point_idx + k] = 1
+            sparsity[2 * rows + 1, n_cam_params + 3 * point_idx + k] = 1
+
+        result = least_squares(
+            residuals,
+            np.concatenate([cam_params.ravel(), points_3d.ravel()]),
+            jac_sparsity=sparsity.tocsr(),
+            method="trf",
+            x_scale="jac",
+            loss="soft_l1",
+            f_scale=1.0,
+            ftol=1e-4,
+        )
+
+        refined = result.x[:n_cam_params].reshape(n_cams, 6)
+        poses = [poses[0]] + [
+            np.hstack([cv2.Rodrigues(params[:3])[0], params[3:, None]]) for params in refined
+        ]
+        return result.x[n_cam_params:].reshape(n_points, 3), poses
+
+    def _extract_colors(self, images: List[np.ndarray], points_3d: np.ndarray,
+                        poses: List[np.ndarray]) -> np.ndarray:
+        """RGB colour (uint8) of every 3D point, sampled from the images that see it."""
+        K = self._camera_matrix(images[0])
+        projections = np.stack([K @ pose for pose in poses])
+        sizes = np.array([img.shape[:2] for img in images], dtype=np.int64)
+
+        stacked = np.zeros((len(images), sizes[:, 0].max(), sizes[:, 1].max(), 3), dtype=np.uint8)
+        for i, img in enumerate(images):
+            stacked[i, :img.shape[0], :img.shape[1]] = img
+
+        return _sample_colors(np.ascontiguousarray(points_3d, dtype=np.float64),
+                              projections, stacked, sizes)
+
+    def _match_pair(self, desc1: Optional[np.ndarray],
+                    desc2: Optional[np.ndarray]) -> List[Any]:
+        """Match two descriptor sets with 2-NN search and Lowe's ratio test."""
+        if desc1 is None or desc2 is None or len(desc1) < 2 or len(desc2) < 2:
+            return []
+
+        return [
+            pair[0]
+            for pair in self.matcher.knnMatch(desc1, desc2, k=2)
+            if len(pair) == 2 and pair[0].distance < self.ratio_threshold * pair[1].distance
+        ]
+
+    @staticmethod
+    def _root_sift(descriptors: np.ndarray) -> np.ndarray:
+        """Convert SIFT descriptors to RootSIFT."""
+        descriptors = descriptors / (descriptors.sum(axis=1, keepdims=True) + 1e-7)
+        return np.sqrt(descriptors).astype(np.float32)
+
     def _clean_mesh(self, mesh: trimesh.Trimesh) -> trimesh.Trimesh:
         """Clean and optimize 3D mesh."""
+        if MESHLIB_AVAILABLE:
+            return self._clean_mesh_meshlib(mesh)
+
         # Remove duplicate vertices
         mesh.remove_duplicate_faces()
         mesh.remove_unreferenced_vertices()
@@ -234,28 +623,127 @@ class ThreeDModelGenerator:
 
         return mesh
 
+    @staticmethod
+    def _clean_mesh_meshlib(mesh: trimesh.Trimesh) -> trimesh.Trimesh:
+        """Same cleanup as the trimesh chain, with one round trip through MeshLib."""
+        # Dedup is a cheap index pass; hole filling and smoothing walk the
+        # whole mesh, so both run natively on a single MeshLib copy
+        mesh.merge_vertices()
+        mesh.update_faces(mesh.unique_faces())
+
+        mr_mesh = mrmeshnumpy.meshFromFacesVerts(
+            np.ascontiguousarray(mesh.faces, dtype=np.int32),
+            np.ascontiguousarray(mesh.vertices, dtype=np.float32),
+        )
+
+        for edge in mr_mesh.topology.findHoleRepresentiveEdges():
+            params = mrmeshpy.FillHoleParams()
+            params.metric = mrmeshpy.getUniversalMetric(mr_mesh)
+            mrmeshpy.fillHole(mr_mesh, edge, params)
+
+        relax_params = mrmeshpy.MeshRelaxParams()
+        relax_params.iterations = 2
+        mrmeshpy.relax(mr_mesh, relax_params)
+
+        cleaned = trimesh.Trimesh(
+            vertices=mrmeshnumpy.getNumpyVerts(mr_mesh),
+            faces=mrmeshnumpy.getNumpyFaces(mr_mesh.topology),
+            process=False,
+        )
+        cleaned.remove_unreferenced_vertices()
+        return cleaned
+
 
 class ARVirtualTourService:
     """Main service for AR/VR property tours."""
 
+    # File name suffix (after the tour ID) of each stored artifact
+    EXPORT_SUFFIXES = {
+        "model": ".obj",
+        "thumbnail": "_thumb.png",
+        "vr": ".glb",
+        "ar": ".usdz",
+        "web": "_web.glb",
+        "metadata": ".json",
+    }
+
+    # Kinds of detected object that become points of interest
+    POI_KINDS = ("window", "appliance")
+
     def __init__(self):
         self.model_generator = ThreeDModelGenerator()
         self.tours_storage = Path(settings.ASSETS_DIR) / "tours"
         self.tours_storage.mkdir(parents=True, exist_ok=True)
 
+        # A cv2.dnn.Net is not thread-safe; tours share one behind a lock.
+        # poi_classes maps detector class ids to (POI kind, title)
+        self.poi_detector, self.poi_classes = self._init_poi_detector()
+        self.poi_confidence = 0.5
+        self._detector_lock = threading.Lock()
+
+        # A GL context belongs to the thread that created it, so thumbnails are
+        # rendered on one dedicated thread that owns a single offscreen renderer
+        self._render_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tour-render")
+        self._renderer = None
+        self.thumbnail_size = 512
+
+    def _init_poi_detector(self) -> Tuple[Optional[Any], Dict[int, Tuple[str, str]]]:
+        """Load the POI detector and its label map if both are deployed.
+
+        The detector is any OpenCV DNN model ending in an SSD DetectionOutput
+        layer, stored as ``models/poi_detector.onnx`` under ASSETS_DIR. Its class
+        ids are read from the sidecar ``poi_detector.labels.json`` next to it.
+        The sidecar maps each id to the POI it produces; ids not listed are
+        ignored::
+
+            {"1": {"kind": "window", "title": "Window"},
+             "2": {"kind": "appliance", "title": "Refrigerator"}}
+
+        Without both files only the measurement POI is produced.
+        """
+        model_path = Path(settings.ASSETS_DIR) / "models" / "poi_detector.onnx"
+        if not model_path.exists():
+            return None, {}
+
+        labels_path = model_path.with_suffix(".labels.json")
+        if not labels_path.exists():
+            logger.warning(f"POI detector disabled: no label map at {labels_path}")
+            return None, {}
+
+        return cv2.dnn.readNet(str(model_path)), self._load_poi_labels(labels_path)
+
+    @classmethod
+    def _load_poi_labels(cls, labels_path: Path) -> Dict[int, Tuple[str, str]]:
+        """Read a detector label map into {class_id: (POI kind, title)}."""
+        labels = json.loads(labels_path.read_text())
+
+        poi_classes = {}
+        for class_id, label in labels.items():
+            kind = label.get("kind")
+            if kind not in cls.POI_KINDS:
+                raise ValueError(f"{labels_path}: class {class_id} has unknown POI kind {kind!r}")
+            poi_classes[int(class_id)] = (kind, label.get("title") or kind.title())
+        return poi_classes
+
     async def create_tour(self, config: ARTourConfig,
                          images: List[bytes]) -> ARTourModel:
         """Create AR/VR tour from property images."""
         logger.info(f"Creating AR/VR tour for property {config.property_id}")
 
         try:
-            # Generate unique tour ID
+            # Generate unique tour ID and every output path up front
             tour_id = str(uuid.uuid4())
+            paths = {
+                name: str(self.tours_storage / f"{tour_id}{suffix}")
+                for name, suffix in self.EXPORT_SUFFIXES.items()
+            }
 
-            # Convert images to numpy arrays
+            # Decode straight into contiguous BGR uint8 arrays for OpenCV
             image_arrays = []
-            for img_bytes in images:
-                img_array = np.array(Image.open(io.BytesIO(img_bytes)))
+            for i, img_bytes in enumerate(images):
+                img_array = cv2.imdecode(np.frombuffer(img_bytes, np.uint8), cv2.IMREAD_COLOR)
+                if img_array is None:
+                    raise ValueError(f"Image {i} could not be decoded")
                 image_arrays.append(img_array)
 
             # Generate 3D model
@@ -273,20 +761,20 @@ class ARVirtualTourService:
             if config.include_measurements:
                 room_mesh = self._add_measurements(room_mesh)
 
-            # Save 3D model
-            model_path = self.tours_storage / f"{tour_id}.obj"
-            room_mesh.export(str(model_path))
-
-            # Generate renderings
-            thumbnail_url = await self._generate_thumbnail(room_mesh, tour_id)
-
-            # Create different format exports
-            vr_url = await self._export_vr_format(room_mesh, tour_id)
-            ar_url = await self._export_ar_format(room_mesh, tour_id)
-            web_url = await self._export_web_format(room_mesh, tour_id)
-
-            # Detect points of interest
-            pois = await self._detect_pois(room_mesh, image_arrays)
+            # Exports only read the mesh; warm trimesh's cached normals first so
+            # the concurrent writers don't race to compute them
+            room_mesh.vertex_normals
+
+            # Save 3D model, render, export every format and detect points of
+            # interest concurrently
+            _, thumbnail_url, vr_url, ar_url, web_url, pois = await asyncio.gather(
+                asyncio.to_thread(room_mesh.export, paths["model"]),
+                self._generate_thumbnail(room_mesh, tour_id, paths["thumbnail"]),
+                self._export_vr_format(room_mesh, tour_id, paths["vr"]),
+                self._export_ar_format(room_mesh, tour_id, paths["ar"]),
+                self._export_web_format(room_mesh, tour_id, paths["web"]),
+                self._detect_pois(room_mesh, image_arrays),
+            )
 
             # Create tour model
             tour = ARTourModel(
@@ -308,7 +796,7 @@ class ARVirtualTourService:
             )
 
             # Save tour metadata
-            await self._save_tour_metadata(tour)
+            await self._save_tour_metadata(tour, paths["metadata"])
 
             return tour
 
@@ -317,57 +805,96 @@ class ARVirtualTourService:
             raise ProcessingError(f"Tour creation failed: {str(e)}")
 
     async def _generate_thumbnail(self, mesh: trimesh.Trimesh,
-                                 tour_id: str) -> str:
+                                 tour_id: str, thumbnail_path: str) -> str:
         """Generate thumbnail image of 3D model."""
-        # Render using trimesh
-        scene = mesh.scene()
-        png = scene.save_image()
+        # Both renderers create their GL context on the render thread and only
+        # ever use it there
+        render = self._render_png if PYRENDER_AVAILABLE else self._save_scene_image
+        png = await asyncio.get_running_loop().run_in_executor(
+            self._render_executor, render, mesh
+        )
 
         # Save thumbnail
-        thumbnail_path = self.tours_storage / f"{tour_id}_thumb.png"
-        with open(thumbnail_path, "wb") as f:
-            f.write(png)
+        await asyncio.to_thread(self._write_bytes, thumbnail_path, png)
 
         return f"/tours/{tour_id}_thumb.png"
 
+    def _render_png(self, mesh: trimesh.Trimesh) -> bytes:
+        """Render a PNG thumbnail with the persistent offscreen renderer (render thread only)."""
+        if self._renderer is None:
+            self._renderer = pyrender.OffscreenRenderer(
+                viewport_width=self.thumbnail_size, viewport_height=self.thumbnail_size
+            )
+
+        # Frame the mesh the way trimesh's own viewer would
+        framing = mesh.scene()
+        camera_pose = framing.camera_transform
+
+        scene = pyrender.Scene(ambient_light=np.full(3, 0.3))
+        scene.add(pyrender.Mesh.from_trimesh(mesh))
+        # Square viewport: use the wider field of view so nothing is cropped
+        yfov = np.radians(framing.camera.fov.max())
+        scene.add(pyrender.PerspectiveCamera(yfov=yfov, aspectRatio=1.0), pose=camera_pose)
+        scene.add(pyrender.DirectionalLight(color=np.ones(3), intensity=3.0), pose=camera_pose)
+
+        color, _ = self._renderer.render(scene)
+        return cv2.imencode(".png", cv2.cvtColor(color, cv2.COLOR_RGB2BGR))[1].tobytes()
+
+    @staticmethod
+    def _save_scene_image(mesh: trimesh.Trimesh) -> bytes:
+        """Render a PNG thumbnail with trimesh's viewer (render thread only).
+
+        Opens a GL window per call; the fallback when pyrender is not installed.
+        """
+        return mesh.scene().save_image()
+
+    @staticmethod
+    def _write_bytes(path: str, data: bytes) -> None:
+        """Write a whole file (runs in a worker thread)."""
+        with open(path, "wb") as f:
+            f.write(data)
+
     async def _export_vr_format(self, mesh: trimesh.Trimesh,
-                              tour_id: str) -> str:
+                              tour_id: str, vr_path: str) -> str:
         """Export model for VR viewing (GLB format)."""
-        vr_path = self.tours_storage / f"{tour_id}.glb"
-        mesh.export(str(vr_path))
+        await asyncio.to_thread(mesh.export, vr_path)
         return f"/tours/{tour_id}.glb"
 
     async def _export_ar_format(self, mesh: trimesh.Trimesh,
-                              tour_id: str) -> str:
+                              tour_id: str, ar_path: str) -> str:
         """Export model for AR viewing (USDZ format)."""
         # Convert to USDZ for ARKit/ARCore
-        ar_path = self.tours_storage / f"{tour_id}.usdz"
-        mesh.export(str(ar_path))
+        await asyncio.to_thread(mesh.export, ar_path)
         return f"/tours/{tour_id}.usdz"
 
     async def _export_web_format(self, mesh: trimesh.Trimesh,
-                               tour_id: str) -> str:
-        """Export model for web viewing (Three.js format)."""
-        # Export to JSON for Three.js
-        web_data = {
-            "vertices": mesh.vertices.tolist(),
-            "faces": mesh.faces.tolist(),
-            "normals": mesh.vertex_normals.tolist()
-        }
+                               tour_id: str, web_path: str) -> str:
+        """Export model for web viewing (binary glTF for Three.js' GLTFLoader)."""
+        # GLB stores positions/normals as FP32 and indices as uint32 buffers the
+        # browser uploads as-is, instead of FP64 decimal text it has to parse
+        await asyncio.to_thread(mesh.export, web_path, file_type="glb", include_normals=True)
+
+        return f"/tours/{tour_id}_web.glb"
 
-        web_path = self.tours_storage / f"{tour_id}.json"
-        with open(web_path, "w") as f:
-            json.dump(web_data, f)
+    async def _save_tour_metadata(self, tour: ARTourModel, metadata_path: str) -> None:
+        """Persist the tour description next to its assets."""
+        if ORJSON_AVAILABLE:
+            data = orjson.dumps(tour.model_dump(), option=orjson.OPT_SERIALIZE_NUMPY)
+        else:
+            data = tour.model_dump_json().encode()
 
-        return f"/tours/{tour_id}.json"
+        await asyncio.to_thread(self._write_bytes, metadata_path, data)
 
     async def _detect_pois(self, mesh: trimesh.Trimesh,
                           images: List[np.ndarray]) -> List[ARPointOfInterest]:
         """Detect points of interest in the room."""
         pois = []
 
+        # One batched forward pass over every image, shared by both POI kinds
+        detections = await asyncio.to_thread(self._detect_objects, images)
+
         # Detect windows
-        windows = await self._detect_windows(images)
+        windows = self._detect_windows(detections, mesh)
         for i, window in enumerate(windows):
             pois.append(ARPointOfInterest(
                 id=f"window_{i}",
@@ -379,7 +906,7 @@ class ARVirtualTourService:
             ))
 
         # Detect appliances
-        appliances = await self._detect_appliances(images)
+        appliances = self._detect_appliances(detections, mesh)
         for i, appliance in enumerate(appliances):
             pois.append(ARPointOfInterest(
                 id=f"appliance_{i}",
@@ -404,19 +931,72 @@ class ARVirtualTourService:
 
         return pois
 
+    def _detect_objects(self, images: List[np.ndarray]) -> np.ndarray:
+        """Detect objects in all images with a single forward pass.
+
+        Returns confident rows of [image_id, class_id, confidence, x1, y1, x2, y2]
+        with box corners normalised to [0, 1].
+        """
+        if self.poi_detector is None or not images:
+            return np.empty((0, 7), dtype=np.float32)
+
+        blob = cv2.dnn.blobFromImages(
+            images, scalefactor=1 / 127.5, size=(300, 300), mean=(127.5, 127.5, 127.5), swapRB=True
+        )
+        with self._detector_lock:
+            self.poi_detector.setInput(blob)
+            rows = self.poi_detector.forward().reshape(-1, 7)
+
+        return rows[rows[:, 2] >= self.poi_confidence]
+
+    def _detections_of(self, detections: np.ndarray, kind: str,
+                       mesh: trimesh.Trimesh) -> List[Tuple[str, float, List[float]]]:
+        """(title, confidence, position) of every detection of one POI kind.
+
+        Positions are approximated by mapping the box centre onto the far wall
+        of the room's bounding box.
+        """
+        lower, upper = mesh.bounds
+        found = []
+        for _, class_id, confidence, x1, y1, x2, y2 in detections:
+            poi_kind, title = self.poi_classes.get(int(class_id), (None, None))
+            if poi_kind != kind:
+                continue
+            cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+            position = [
+                float(lower[0] + cx * (upper[0] - lower[0])),
+                float(upper[1]),
+                float(lower[2] + (1 - cy) * (upper[2] - lower[2])),
+            ]
+            found.append((title, float(confidence), position))
+        return found
+
+    def _detect_windows(self, detections: np.ndarray,
+                        mesh: trimesh.Trimesh) -> List[Dict[str, Any]]:
+        """Windows among the batched detections."""
+        return [
+            {"position": position, "quality": "clear" if confidence >= 0.8 else "partial"}
+            for _, confidence, position in self._detections_of(detections, "window", mesh)
+        ]
+
+    def _detect_appliances(self, detections: np.ndarray,
+                           mesh: trimesh.Trimesh) -> List[Dict[str, Any]]:
+        """Appliances among the batched detections."""
+        return [
+            {"name": title, "brand": "Detected", "model": f"({confidence:.0%} confidence)",
+             "position": position}
+            for title, confidence, position in self._detections_of(detections, "appliance", mesh)
+        ]
+
     def _get_room_dimensions(self, mesh: trimesh.Trimesh) -> Dict[str, float]:
         """Calculate room dimensions from mesh."""
-        bounds = mesh.bounds
-        length = bounds[1][0] - bounds[0][0]
-        width = bounds[1][1] - bounds[0][1]
-        height = bounds[1][2] - bounds[0][2]
-        area = length * width
+        length, width, height = (mesh.bounds[1] - mesh.bounds[0]).tolist()
 
         return {
             "length": round(length, 2),
             "width": round(width, 2),
             "height": round(height, 2),
-            "area": round(area, 2)
+            "area": round(length * width, 2)
         }
 
 
@@ -12,7 +12,11 @@ AI-powered predictive maintenance for property management:
 import asyncio
 import json
 import logging
+import warnings
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
 from enum import Enum
 import uuid
@@ -25,6 +29,20 @@ import joblib
 from pydantic import BaseModel, Field
 from fastapi import HTTPException, status
 
+# Optional: numba compiles the sensor threshold scan; without it the scan runs
+# as plain NumPy array expressions
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for ``numba.njit`` (bare or with options)."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda fn: fn
+
 from ..core.config import get_settings
 from ..core.logging import get_logger
 from ..core.exceptions import PredictionError
@@ -32,6 +50,24 @@ from ..core.exceptions import PredictionError
 logger = get_logger(__name__)
 settings = get_settings()
 
+# Issue bits set by _scan_issues, in the order parts are listed
+HIGH_TEMPERATURE, LOW_TEMPERATURE, HIGH_VIBRATION, HIGH_PRESSURE, LOW_PRESSURE = (1 << i for i in range(5))
+ISSUE_PARTS = (
+    (HIGH_TEMPERATURE, ("Thermal overload protector",)),
+    (LOW_TEMPERATURE, ("Heating element",)),
+    (HIGH_VIBRATION, ("Motor bearings", "Mounting hardware")),
+    (HIGH_PRESSURE, ("Pressure relief valve",)),
+    (LOW_PRESSURE, ("Pump seal",)),
+)
+
+
+@njit
+def _scan_issues(temps: np.ndarray, vibs: np.ndarray, press: np.ndarray) -> np.ndarray:
+    """Per-reading bitmask of sensor issues; NaN (missing) values never trip a threshold."""
+    return ((temps > 90) * HIGH_TEMPERATURE | (temps < 0) * LOW_TEMPERATURE
+            | (vibs > 5.0) * HIGH_VIBRATION
+            | (press > 150) * HIGH_PRESSURE | (press < 10) * LOW_PRESSURE).astype(np.uint8)
+
 
 class EquipmentType(str, Enum):
     """Types of equipment in properties."""
@@ -79,6 +115,21 @@ class IoTReading(BaseModel):
     alerts: List[str] = Field(default_factory=list)
 
 
+@dataclass
+class IoTReadingRecord:
+    """IoT sensor reading built internally (no validation, no per-instance dict).
+
+    Exposes the same attributes as IoTReading, which stays the API model.
+    """
+    __slots__ = ("sensor_id", "equipment_id", "timestamp", "readings", "alerts")
+
+    sensor_id: str
+    equipment_id: str
+    timestamp: datetime
+    readings: Dict[str, float]
+    alerts: List[str]
+
+
 class Equipment(BaseModel):
     """Equipment information."""
     equipment_id: str
@@ -94,28 +145,109 @@ class Equipment(BaseModel):
     maintenance_history: List[Dict] = Field(default_factory=list)
 
 
+# Priority buckets split at failure probability strictly above 0.3 / 0.5 / 0.7
+# (searchsorted side='left'), with each bucket's priority and lead time in days
+PRIORITY_THRESHOLDS = np.array([0.3, 0.5, 0.7])
+PRIORITY_BY_BUCKET = (
+    MaintenancePriority.LOW,
+    MaintenancePriority.MEDIUM,
+    MaintenancePriority.HIGH,
+    MaintenancePriority.CRITICAL,
+)
+DAYS_AHEAD_BY_BUCKET = (30, 14, 7, 3)
+
+
+# Per equipment type lookups, keyed by EquipmentType value
+BASE_REPAIR_COSTS = {
+    "hvac": 500,
+    "plumbing": 300,
+    "electrical": 400,
+    "appliance": 200,
+    "roof": 2000,
+    "foundation": 5000,
+    "windows": 600,
+    "insulation": 800
+}
+
+# Base repair duration in hours
+BASE_REPAIR_DURATIONS = {
+    "hvac": 4,
+    "plumbing": 2,
+    "electrical": 3,
+    "appliance": 2,
+    "roof": 8,
+    "foundation": 24,
+    "windows": 3,
+    "insulation": 6
+}
+
+# Routine maintenance intervals in days
+MAINTENANCE_INTERVALS = {
+    "hvac": 90,
+    "plumbing": 180,
+    "electrical": 365,
+    "appliance": 180,
+    "roof": 180,
+    "foundation": 365,
+    "windows": 365,
+    "insulation": 365
+}
+
+REQUIRED_SKILLS = {
+    "hvac": ("HVAC certification", "Refrigerant handling"),
+    "plumbing": ("Plumbing license", "Pipe fitting"),
+    "electrical": ("Electrician license", "Knowledge of NEC"),
+    "appliance": ("Appliance repair", "Electronics"),
+    "roof": ("Roofing certification", "Safety training"),
+    "foundation": ("Structural engineering", "Concrete work"),
+    "windows": ("Window installation", "Glazing"),
+    "insulation": ("Insulation installation", "Safety training")
+}
+
+# Parts commonly needed regardless of sensor data
+COMMON_PARTS = {
+    "hvac": ("Air filter", "Refrigerant", "Capacitor"),
+    "plumbing": ("Pipe seal", "Valve assembly", "Gasket kit"),
+    "electrical": ("Circuit breaker", "Wiring harness", "Fuse"),
+    "appliance": ("Control board", "Heating element", "Seal gasket")
+}
+
+
+@lru_cache(maxsize=1)
+def _load_all_models() -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Load trained failure models and scalers once per process, keyed by equipment type."""
+    models, scalers = {}, {}
+    try:
+        # Load failure prediction models
+        for equipment_type in EquipmentType:
+            model_path = f"models/maintenance/failure_prediction_{equipment_type.value}.joblib"
+            if Path(model_path).exists():
+                models[equipment_type.value] = joblib.load(model_path)
+                scaler_path = f"models/maintenance/scaler_{equipment_type.value}.joblib"
+                scalers[equipment_type.value] = joblib.load(scaler_path)
+                logger.info(f"Loaded model for {equipment_type.value}")
+    except Exception as e:
+        logger.warning(f"Failed to load models: {e}")
+    return models, scalers
+
+
 class PredictiveMaintenanceService:
     """Main service for predictive maintenance."""
 
     def __init__(self):
-        self.models = {}
-        self.scalers = {}
         self.load_models()
         self.vendor_database = self._load_vendor_database()
 
+        # Highest-rated vendor per equipment type, picked once
+        self._best_vendor_by_type = {
+            equipment_type: max(vendors, key=lambda v: v["rating"])
+            for equipment_type, vendors in self.vendor_database.items()
+            if vendors
+        }
+
     def load_models(self):
-        """Load trained ML models."""
-        try:
-            # Load failure prediction models
-            for equipment_type in EquipmentType:
-                model_path = f"models/maintenance/failure_prediction_{equipment_type.value}.joblib"
-                if Path(model_path).exists():
-                    self.models[equipment_type.value] = joblib.load(model_path)
-                    scaler_path = f"models/maintenance/scaler_{equipment_type.value}.joblib"
-                    self.scalers[equipment_type.value] = joblib.load(scaler_path)
-                    logger.info(f"Loaded model for {equipment_type.value}")
-        except Exception as e:
-            logger.warning(f"Failed to load models: {e}")
+        """Load trained ML models (shared by every service instance)."""
+        self.models, self.scalers = _load_all_models()
 
     def _load_vendor_database(self) -> Dict:
         """Load vendor database."""
@@ -161,43 +293,66 @@ class PredictiveMaintenanceService:
         }
 
     async def predict_failures(self, equipment: Equipment,
-                             sensor_readings: List[IoTReading]) -> List[MaintenanceTask]:
+                             sensor_readings: List[IoTReading],
+                             now: Optional[datetime] = None) -> List[MaintenanceTask]:
         """Predict equipment failures and create maintenance tasks."""
         logger.info(f"Predicting failures for equipment {equipment.equipment_id}")
 
-        tasks = []
-
-        # Prepare features for prediction
-        features = self._prepare_features(equipment, sensor_readings)
-
-        # Make predictions
-        if equipment.equipment_type.value in self.models:
-            model = self.models[equipment.equipment_type.value]
-            scaler = self.scalers[equipment.equipment_type.value]
+        return await self.predict_failures_batch(
+            [equipment], {equipment.equipment_id: sensor_readings}, now
+        )
 
-            # Scale features
-            features_scaled = scaler.transform([features])
+    async def predict_failures_batch(self, equipment_list: List[Equipment],
+                                   readings_by_id: Dict[str, List[IoTReading]],
+                                   now: Optional[datetime] = None) -> List[MaintenanceTask]:
+        """Predict failures for many equipment units with one model call per type."""
+        if now is None:
+            now = datetime.utcnow()
+        # Group equipment with a trained model by type
+        groups: Dict[str, List[int]] = {}
+        for i, equipment in enumerate(equipment_list):
+            if equipment.equipment_type.value in self.models:
+                groups.setdefault(equipment.equipment_type.value, []).append(i)
+
+        # Prepare features, scale and predict failure probability per group
+        failure_probs = np.zeros(len(equipment_list))
+        for type_value, indices in groups.items():
+            features = np.array([
+                self._prepare_features(
+                    equipment_list[i], readings_by_id.get(equipment_list[i].equipment_id, []), now
+                )
+                for i in indices
+            ])
+            features_scaled = self.scalers[type_value].transform(features)
+            failure_probs[indices] = self.models[type_value].predict_proba(features_scaled)[:, 1]
 
-            # Predict failure probability
-            failure_prob = model.predict_proba(features_scaled)[0][1]
+        # If high risk, create maintenance task
+        high_risk = np.flatnonzero(failure_probs > PRIORITY_THRESHOLDS[0])  # 30% threshold
+        buckets = np.searchsorted(PRIORITY_THRESHOLDS, failure_probs[high_risk])
 
-            # If high risk, create maintenance task
-            if failure_prob > 0.3:  # 30% threshold
-                task = await self._create_maintenance_task(
-                    equipment, failure_prob, sensor_readings
-                )
-                tasks.append(task)
+        tasks = []
+        for i, bucket in zip(high_risk, buckets):
+            equipment = equipment_list[i]
+            task = await self._create_maintenance_task(
+                equipment, float(failure_probs[i]),
+                readings_by_id.get(equipment.equipment_id, []), now, int(bucket)
+            )
+            tasks.append(task)
 
         return tasks
 
     def _prepare_features(self, equipment: Equipment,
-                         sensor_readings: List[IoTReading]) -> List[float]:
+                         sensor_readings: List[IoTReading],
+                         now: Optional[datetime] = None) -> List[float]:
         """Prepare features for ML model."""
+        if now is None:
+            now = datetime.utcnow()
+
         # Time-based features
-        age_years = (datetime.utcnow() - equipment.install_date).days / 365
+        age_years = (now - equipment.install_date).days / 365
         days_since_maintenance = 0
         if equipment.last_maintenance:
-            days_since_maintenance = (datetime.utcnow() - equipment.last_maintenance).days
+            days_since_maintenance = (now - equipment.last_maintenance).days
 
         # Sensor-based features
         recent_readings = sensor_readings[-10:] if sensor_readings else []
@@ -207,22 +362,22 @@ class PredictiveMaintenanceService:
         anomaly_count = 0
 
         if recent_readings:
-            temps = []
-            vibrations = []
-            powers = []
-
-            for reading in recent_readings:
-                if "temperature" in reading.readings:
-                    temps.append(reading.readings["temperature"])
-                if "vibration" in reading.readings:
-                    vibrations.append(reading.readings["vibration"])
-                if "power_consumption" in reading.readings:
-                    powers.append(reading.readings["power_consumption"])
-                anomaly_count += len(reading.alerts)
-
-            avg_temperature = np.mean(temps) if temps else 0
-            avg_vibration = np.mean(vibrations) if vibrations else 0
-            avg_power_consumption = np.mean(powers) if powers else 0
+            # One (n, 3) buffer with NaN for missing channels, averaged in one call
+            buf = np.array([
+                (reading.readings.get("temperature", np.nan),
+                 reading.readings.get("vibration", np.nan),
+                 reading.readings.get("power_consumption", np.nan))
+                for reading in recent_readings
+            ], dtype=np.float64)
+            with np.errstate(invalid="ignore"), warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN channel
+                means = np.nan_to_num(np.nanmean(buf, axis=0))
+            avg_temperature, avg_vibration, avg_power_consumption = means
+
+            anomaly_count = int(np.fromiter(
+                (len(reading.alerts) for reading in recent_readings),
+                dtype=np.int32, count=len(recent_readings)
+            ).sum())
 
         # Maintenance history features
         maintenance_count = len(equipment.maintenance_history)
@@ -248,21 +403,18 @@ class PredictiveMaintenanceService:
 
     async def _create_maintenance_task(self, equipment: Equipment,
                                      failure_prob: float,
-                                     sensor_readings: List[IoTReading]) -> MaintenanceTask:
+                                     sensor_readings: List[IoTReading],
+                                     now: Optional[datetime] = None,
+                                     bucket: Optional[int] = None) -> MaintenanceTask:
         """Create a maintenance task based on prediction."""
+        if now is None:
+            now = datetime.utcnow()
+
         # Determine priority
-        if failure_prob > 0.7:
-            priority = MaintenancePriority.CRITICAL
-            days_ahead = 3
-        elif failure_prob > 0.5:
-            priority = MaintenancePriority.HIGH
-            days_ahead = 7
-        elif failure_prob > 0.3:
-            priority = MaintenancePriority.MEDIUM
-            days_ahead = 14
-        else:
-            priority = MaintenancePriority.LOW
-            days_ahead = 30
+        if bucket is None:
+            bucket = int(np.searchsorted(PRIORITY_THRESHOLDS, failure_prob))
+        priority = PRIORITY_BY_BUCKET[bucket]
+        days_ahead = DAYS_AHEAD_BY_BUCKET[bucket]
 
         # Estimate cost
         base_cost = self._get_base_repair_cost(equipment.equipment_type)
@@ -282,7 +434,7 @@ class PredictiveMaintenanceService:
 
         # Create task description
         description = self._generate_task_description(
-            equipment, failure_prob, sensor_readings
+            equipment, failure_prob, sensor_readings, now
         )
 
         task = MaintenanceTask(
@@ -295,7 +447,7 @@ class PredictiveMaintenanceService:
             estimated_cost=estimated_cost,
             estimated_duration=int(estimated_duration),
             failure_probability=failure_prob,
-            recommended_date=datetime.utcnow() + timedelta(days=days_ahead),
+            recommended_date=now + timedelta(days=days_ahead),
             vendor_recommendation=vendor,
             required_skills=required_skills,
             required_parts=required_parts
@@ -305,40 +457,15 @@ class PredictiveMaintenanceService:
 
     def _get_base_repair_cost(self, equipment_type: EquipmentType) -> float:
         """Get base repair cost for equipment type."""
-        costs = {
-            EquipmentType.HVAC: 500,
-            EquipmentType.PLUMBING: 300,
-            EquipmentType.ELECTRICAL: 400,
-            EquipmentType.APPLIANCE: 200,
-            EquipmentType.ROOF: 2000,
-            EquipmentType.FOUNDATION: 5000,
-            EquipmentType.WINDOWS: 600,
-            EquipmentType.INSULATION: 800
-        }
-        return costs.get(equipment_type, 500)
+        return BASE_REPAIR_COSTS.get(equipment_type.value, 500)
 
     def _get_base_repair_duration(self, equipment_type: EquipmentType) -> int:
         """Get base repair duration in hours."""
-        durations = {
-            EquipmentType.HVAC: 4,
-            EquipmentType.PLUMBING: 2,
-            EquipmentType.ELECTRICAL: 3,
-            EquipmentType.APPLIANCE: 2,
-            EquipmentType.ROOF: 8,
-            EquipmentType.FOUNDATION: 24,
-            EquipmentType.WINDOWS: 3,
-            EquipmentType.INSULATION: 6
-        }
-        return durations.get(equipment_type, 4)
+        return BASE_REPAIR_DURATIONS.get(equipment_type.value, 4)
 
     def _recommend_vendor(self, equipment_type: EquipmentType) -> Dict[str, Any]:
         """Recommend best vendor for equipment type."""
-        vendors = self.vendor_database.get(equipment_type.value, [])
-        if vendors:
-            # Select vendor with highest rating
-            best_vendor = max(vendors, key=lambda v: v["rating"])
-            return best_vendor
-        return {}
+        return self._best_vendor_by_type.get(equipment_type.value, {})
 
     def _get_required_parts(self, equipment: Equipment,
                           sensor_readings: List[IoTReading]) -> List[str]:
@@ -346,56 +473,37 @@ class PredictiveMaintenanceService:
         parts = []
 
         # Analyze sensor readings for specific issues
-        for reading in sensor_readings[-5:]:  # Check recent readings
-            if "temperature" in reading.readings:
-                if reading.readings["temperature"] > 90:
-                    parts.append("Thermal overload protector")
-                elif reading.readings["temperature"] < 0:
-                    parts.append("Heating element")
-
-            if "vibration" in reading.readings:
-                if reading.readings["vibration"] > 5.0:
-                    parts.append("Motor bearings")
-                    parts.append("Mounting hardware")
-
-            if "pressure" in reading.readings:
-                if reading.readings["pressure"] > 150:
-                    parts.append("Pressure relief valve")
-                elif reading.readings["pressure"] < 10:
-                    parts.append("Pump seal")
+        recent = sensor_readings[-5:]  # Check recent readings
+        if recent:
+            columns = np.array([
+                (reading.readings.get("temperature", np.nan),
+                 reading.readings.get("vibration", np.nan),
+                 reading.readings.get("pressure", np.nan))
+                for reading in recent
+            ], dtype=np.float64).T
+            issues = int(np.bitwise_or.reduce(_scan_issues(*np.ascontiguousarray(columns))))
+            for flag, flag_parts in ISSUE_PARTS:
+                if issues & flag:
+                    parts.extend(flag_parts)
 
         # Add common parts based on equipment type
-        common_parts = {
-            EquipmentType.HVAC: ["Air filter", "Refrigerant", "Capacitor"],
-            EquipmentType.PLUMBING: ["Pipe seal", "Valve assembly", "Gasket kit"],
-            EquipmentType.ELECTRICAL: ["Circuit breaker", "Wiring harness", "Fuse"],
-            EquipmentType.APPLIANCE: ["Control board", "Heating element", "Seal gasket"]
-        }
+        parts.extend(COMMON_PARTS.get(equipment.equipment_type.value, ()))
 
-        parts.extend(common_parts.get(equipment.equipment_type, []))
-
-        # Remove duplicates
-        return list(set(parts))
+        # Remove duplicates, keeping sensor-driven parts first
+        return list(dict.fromkeys(parts))
 
     def _get_required_skills(self, equipment_type: EquipmentType) -> List[str]:
         """Get required skills for equipment type."""
-        skills = {
-            EquipmentType.HVAC: ["HVAC certification", "Refrigerant handling"],
-            EquipmentType.PLUMBING: ["Plumbing license", "Pipe fitting"],
-            EquipmentType.ELECTRICAL: ["Electrician license", "Knowledge of NEC"],
-            EquipmentType.APPLIANCE: ["Appliance repair", "Electronics"],
-            EquipmentType.ROOF: ["Roofing certification", "Safety training"],
-            EquipmentType.FOUNDATION: ["Structural engineering", "Concrete work"],
-            EquipmentType.WINDOWS: ["Window installation", "Glazing"],
-            EquipmentType.INSULATION: ["Insulation installation", "Safety training"]
-        }
-        return skills.get(equipment_type, ["General maintenance"])
+        return list(REQUIRED_SKILLS.get(equipment_type.value, ("General maintenance",)))
 
     def _generate_task_description(self, equipment: Equipment,
                                  failure_prob: float,
-                                 sensor_readings: List[IoTReading]) -> str:
+                                 sensor_readings: List[IoTReading],
+                                 now: Optional[datetime] = None) -> str:
         """Generate task description based on analysis."""
-        age_years = (datetime.utcnow() - equipment.install_date).days / 365
+        if now is None:
+            now = datetime.utcnow()
+        age_years = (now - equipment.install_date).days / 365
 
         description = f"Predictive maintenance for {equipment.brand} {equipment.model} "
         description += f"(age: {age_years:.1f} years). Risk level: {failure_prob:.1%}. "
@@ -424,7 +532,8 @@ class PredictiveMaintenanceService:
 
     async def optimize_maintenance_schedule(self,
                                           tasks: List[MaintenanceTask],
-                                          constraints: Dict[str, Any]) -> Dict[str, Any]:
+                                          constraints: Dict[str, Any],
+                                          now: Optional[datetime] = None) -> Dict[str, Any]:
         """Optimize maintenance schedule based on constraints."""
         logger.info(f"Optimizing schedule for {len(tasks)} tasks")
 
@@ -440,8 +549,11 @@ class PredictiveMaintenanceService:
         budget_remaining = constraints.get("budget", float('inf'))
         weekly_capacity = constraints.get("weekly_hours", 40)
 
-        current_week = datetime.utcnow()
+        if now is None:
+            now = datetime.utcnow()
+        current_week = now
         week_hours_used = 0
+        total_cost = 0.0
 
         for task in sorted_tasks:
             # Check budget
@@ -468,11 +580,9 @@ class PredictiveMaintenanceService:
             # Update counters
             budget_remaining -= task.estimated_cost
             week_hours_used += task.estimated_duration
+            total_cost += task.estimated_cost
 
         # Calculate schedule metrics
-        total_cost = sum(t.estimated_cost for t in tasks if any(
-            s["task_id"] == t.task_id for s in schedule
-        ))
         total_duration = sum(s["duration"] for s in schedule)
         completion_date = max(s["scheduled_date"] for s in schedule) if schedule else None
 
@@ -492,7 +602,7 @@ class MaintenanceScheduler:
     """Advanced maintenance scheduling with optimization."""
 
     def __init__(self):
-        self.service = PredictiveMaintenanceService()
+        self.service = predictive_maintenance_service
 
     async def create_maintenance_plan(self,
                                     property_id: str,
@@ -502,18 +612,17 @@ class MaintenanceScheduler:
         """Create comprehensive maintenance plan."""
         logger.info(f"Creating maintenance plan for property {property_id}")
 
+        # One reference time for every date computed in this plan
+        now = datetime.utcnow()
+
         # Get all sensor readings for equipment
-        sensor_readings = await self._get_sensor_readings(equipment_list)
+        sensor_readings = await self._get_sensor_readings(equipment_list, now)
 
         # Predict failures for all equipment
-        all_tasks = []
-        for equipment in equipment_list:
-            readings = sensor_readings.get(equipment.equipment_id, [])
-            tasks = await self.service.predict_failures(equipment, readings)
-            all_tasks.extend(tasks)
+        all_tasks = await self.service.predict_failures_batch(equipment_list, sensor_readings, now)
 
         # Add routine maintenance tasks
-        routine_tasks = await self._generate_routine_tasks(equipment_list)
+        routine_tasks = await self._generate_routine_tasks(equipment_list, now)
         all_tasks.extend(routine_tasks)
 
         # Optimize schedule
@@ -524,11 +633,11 @@ class MaintenanceScheduler:
         }
 
         optimized_schedule = await self.service.optimize_maintenance_schedule(
-            all_tasks, constraints
+            all_tasks, constraints, now
         )
 
         # Group tasks by week
-        weekly_tasks = self._group_tasks_by_week(optimized_schedule["schedule"])
+        weekly_tasks = self._group_tasks_by_week(optimized_schedule["schedule"], now)
 
         # Calculate total metrics
         total_predicted_cost = sum(t.estimated_cost for t in all_tasks)
@@ -543,57 +652,61 @@ class MaintenanceScheduler:
             "optimized_schedule": optimized_schedule,
             "weekly_breakdown": weekly_tasks,
             "recommendations": await self._generate_recommendations(
-                all_tasks, equipment_list
+                all_tasks, equipment_list, now
             )
         }
 
-    async def _get_sensor_readings(self, equipment_list: List[Equipment]) -> Dict[str, List[IoTReading]]:
+    async def _get_sensor_readings(self, equipment_list: List[Equipment],
+                                   now: Optional[datetime] = None) -> Dict[str, List[IoTReadingRecord]]:
         """Get recent sensor readings for all equipment."""
         # In production, this would query the IoT database
         readings = {}
 
-        for equipment in equipment_list:
-            # Simulate recent readings
+        # Simulate recent readings, drawing every value for every unit at once
+        hours = range(24, 0, -3)  # Last 24 hours
+        shape = (len(equipment_list), len(hours))
+        rng = np.random.default_rng()
+        temps = rng.normal(70, 10, shape)
+        vibs = rng.exponential(1, shape)
+        powers = rng.normal(500, 100, shape)
+
+        if now is None:
+            now = datetime.utcnow()
+        timestamps = [now - timedelta(hours=i) for i in hours]
+
+        for row, equipment in enumerate(equipment_list):
             readings[equipment.equipment_id] = [
-                IoTReading(
+                IoTReadingRecord(
                     sensor_id=f"sensor_{i}",
                     equipment_id=equipment.equipment_id,
-                    timestamp=datetime.utcnow() - timedelta(hours=i),
+                    timestamp=timestamp,
                     readings={
-                        "temperature": np.random.normal(70, 10),
-                        "vibration": np.random.exponential(1),
-                        "power_consumption": np.random.normal(500, 100)
+                        "temperature": float(temps[row, col]),
+                        "vibration": float(vibs[row, col]),
+                        "power_consumption": float(powers[row, col])
                     },
                     alerts=[]
                 )
-                for i in range(24, 0, -3)  # Last 24 hours
+                for col, (i, timestamp) in enumerate(zip(hours, timestamps))
             ]
 
         return readings
 
-    async def _generate_routine_tasks(self, equipment_list: List[Equipment]) -> List[MaintenanceTask]:
+    async def _generate_routine_tasks(self, equipment_list: List[Equipment],
+                                      now: Optional[datetime] = None) -> List[MaintenanceTask]:
         """Generate routine maintenance tasks."""
+        if now is None:
+            now = datetime.utcnow()
+
         tasks = []
 
         for equipment in equipment_list:
             # Check if routine maintenance is due
             days_since_maintenance = 999999  # Large number if no maintenance
             if equipment.last_maintenance:
-                days_since_maintenance = (datetime.utcnow() - equipment.last_maintenance).days
-
-            # Define maintenance intervals in days
-            intervals = {
-                EquipmentType.HVAC: 90,
-                EquipmentType.PLUMBING: 180,
-                EquipmentType.ELECTRICAL: 365,
-                EquipmentType.APPLIANCE: 180,
-                EquipmentType.ROOF: 180,
-                EquipmentType.FOUNDATION: 365,
-                EquipmentType.WINDOWS: 365,
-                EquipmentType.INSULATION: 365
-            }
+                days_since_maintenance = (now - equipment.last_maintenance).days
 
-            interval = intervals.get(equipment.equipment_type, 180)
+            interval = MAINTENANCE_INTERVALS.get(equipment.equipment_type.value, 180)
 
             if days_since_maintenance >= interval:
                 task = MaintenanceTask(
@@ -606,7 +719,7 @@ class MaintenanceScheduler:
                     estimated_cost=self.service._get_base_repair_cost(equipment.equipment_type) * 0.5,
                     estimated_duration=2,
                     failure_probability=0.1,
-                    recommended_date=datetime.utcnow() + timedelta(days=7),
+                    recommended_date=now + timedelta(days=7),
                     vendor_recommendation=self.service._recommend_vendor(equipment.equipment_type),
                     required_skills=self.service._get_required_skills(equipment.equipment_type)
                 )
@@ -614,12 +727,15 @@ class MaintenanceScheduler:
 
         return tasks
 
-    def _group_tasks_by_week(self, schedule: List[Dict]) -> Dict[int, List[Dict]]:
+    def _group_tasks_by_week(self, schedule: List[Dict],
+                             now: Optional[datetime] = None) -> Dict[int, List[Dict]]:
         """Group tasks by week number."""
+        if now is None:
+            now = datetime.utcnow()
         weekly_tasks = {}
 
         for task in schedule:
-            week_num = (task["scheduled_date"] - datetime.utcnow()).days // 7
+            week_num = (task["scheduled_date"] - now).days // 7
             if week_num not in weekly_tasks:
                 weekly_tasks[week_num] = []
             weekly_tasks[week_num].append(task)
@@ -628,8 +744,12 @@ class MaintenanceScheduler:
 
     async def _generate_recommendations(self,
                                       tasks: List[MaintenanceTask],
-                                      equipment_list: List[Equipment]) -> List[str]:
+                                      equipment_list: List[Equipment],
+                                      now: Optional[datetime] = None) -> List[str]:
         """Generate maintenance recommendations."""
+        if now is None:
+            now = datetime.utcnow()
+
         recommendations = []
 
         # Analyze failure patterns
@@ -657,14 +777,13 @@ class MaintenanceScheduler:
             )
 
         # Age-based recommendations
-        old_equipment = [
-            e for e in equipment_list
-            if (datetime.utcnow() - e.install_date).days / 365 > e.expected_lifespan * 0.8
-        ]
+        age_years = np.array([(now - e.install_date).days for e in equipment_list]) / 365
+        lifespans = np.array([e.expected_lifespan for e in equipment_list])
+        old_count = int(np.count_nonzero(age_years > lifespans * 0.8))
 
-        if old_equipment:
+        if old_count:
             recommendations.append(
-                f"{len(old_equipment)} equipment units are nearing end of life. "
+                f"{old_count} equipment units are nearing end of life. "
                 "Plan for replacement in next 1-2 years"
             )
 
@@ -0,0 +1,69 @@
+"""
+Shared pytest configuration for the phase 2 feature modules.
+
+The feature modules import their config, logging and exceptions from a
+``core`` package next to ``features``; the ``phase2`` fixture imports them
+inside a minimal host package that provides those modules, with assets
+kept in a temporary directory.
+"""
+
+import importlib
+import logging
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+FEATURES_DIR = Path(__file__).resolve().parent.parent / "src" / "gogidix_ai" / "phase2" / "features"
+
+
+class _TestSettings:
+    """Settings the feature modules read."""
+    ASSETS_DIR = ""
+
+
+class ProcessingError(Exception):
+    """Stand-in for the host package's ProcessingError."""
+
+
+class PredictionError(Exception):
+    """Stand-in for the host package's PredictionError."""
+
+
+def _host_module(name: str, path=None, **attrs) -> types.ModuleType:
+    module = types.ModuleType(name)
+    if path is not None:
+        module.__path__ = [str(path)]
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    return module
+
+
+@pytest.fixture(scope="session")
+def phase2(tmp_path_factory):
+    """The host package; import feature modules as ``phase2_host.features.<name>``."""
+    _TestSettings.ASSETS_DIR = str(tmp_path_factory.mktemp("assets"))
+    package = _host_module("phase2_host", FEATURES_DIR.parent)
+    _host_module("phase2_host.features", FEATURES_DIR)
+    _host_module("phase2_host.core", FEATURES_DIR.parent / "core")
+    _host_module("phase2_host.core.config", get_settings=lambda: _TestSettings)
+    _host_module("phase2_host.core.logging", get_logger=logging.getLogger)
+    _host_module(
+        "phase2_host.core.exceptions",
+        ProcessingError=ProcessingError,
+        PredictionError=PredictionError
+    )
+    return package
+
+
+@pytest.fixture(scope="session")
+def ar_tours(phase2):
+    """The ar_tours feature module."""
+    return importlib.import_module("phase2_host.features.ar_tours")
+
+
+@pytest.fixture(scope="session")
+def predictive_maintenance(phase2):
+    """The predictive_maintenance feature module."""
+    return importlib.import_module("phase2_host.features.predictive_maintenance")
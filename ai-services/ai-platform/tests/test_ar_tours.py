@@ -0,0 +1,262 @@
+"""
+Test Suite for AR/VR Property Tours
+
+Covers the POI detector label map and structure-from-motion pose
+estimation, outlier rejection, triangulation and bundle adjustment on a
+synthetic scene.
+"""
+
+import json
+import threading
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+import trimesh
+
+
+class TestPOILabels:
+    """Test suite for the detector label map sidecar."""
+
+    @pytest.fixture
+    def models_dir(self, ar_tours, tmp_path, monkeypatch):
+        """Point ASSETS_DIR at an empty directory with a models folder."""
+        monkeypatch.setattr(ar_tours.settings, "ASSETS_DIR", str(tmp_path))
+        (tmp_path / "models").mkdir()
+        return tmp_path / "models"
+
+    @pytest.fixture
+    def service(self, ar_tours, models_dir):
+        """Create a tour service without a deployed detector."""
+        return ar_tours.ARVirtualTourService()
+
+    def test_load_labels(self, ar_tours, tmp_path):
+        """Class ids map to (kind, title); a missing title defaults from the kind."""
+        labels_path = tmp_path / "poi_detector.labels.json"
+        labels_path.write_text(json.dumps({
+            "3": {"kind": "appliance", "title": "Oven"},
+            "7": {"kind": "window"}
+        }))
+
+        labels = ar_tours.ARVirtualTourService._load_poi_labels(labels_path)
+
+        assert labels == {3: ("appliance", "Oven"), 7: ("window", "Window")}
+
+    def test_unknown_kind_rejected(self, ar_tours, tmp_path):
+        """Labels naming a POI kind the tour cannot place are a deployment error."""
+        labels_path = tmp_path / "poi_detector.labels.json"
+        labels_path.write_text(json.dumps({"1": {"kind": "sofa", "title": "Sofa"}}))
+
+        with pytest.raises(ValueError, match="sofa"):
+            ar_tours.ARVirtualTourService._load_poi_labels(labels_path)
+
+    def test_no_detector_deployed(self, service):
+        """Without a model only the measurement POI is produced."""
+        assert service.poi_detector is None
+        assert service.poi_classes == {}
+        assert service._detect_objects([np.zeros((8, 8, 3), np.uint8)]).shape == (0, 7)
+
+    def test_detector_without_labels_disabled(self, ar_tours, models_dir):
+        """A model deployed without its sidecar label map is not loaded."""
+        (models_dir / "poi_detector.onnx").write_bytes(b"")
+
+        service = ar_tours.ARVirtualTourService()
+
+        assert service.poi_detector is None
+        assert service.poi_classes == {}
+
+    def test_detections_use_label_map(self, service):
+        """Detections are classified through the loaded map; unlisted ids are ignored."""
+        service.poi_classes = {4: ("window", "Bay Window"), 9: ("appliance", "Range Hood")}
+        mesh = trimesh.creation.box(extents=(4.0, 3.0, 2.5))
+        detections = np.array([
+            [0, 4, 0.9, 0.0, 0.0, 1.0, 1.0],
+            [0, 9, 0.6, 0.2, 0.2, 0.4, 0.4],
+            [1, 1, 0.95, 0.1, 0.1, 0.3, 0.3],
+        ], dtype=np.float32)
+
+        windows = service._detect_windows(detections, mesh)
+        appliances = service._detect_appliances(detections, mesh)
+
+        assert windows == [{"position": [0.0, 1.5, 0.0], "quality": "clear"}]
+        assert [appliance["name"] for appliance in appliances] == ["Range Hood"]
+
+
+def _pose(rvec, t) -> np.ndarray:
+    """World-to-camera [R|t] from an angle-axis rotation and a translation."""
+    return np.hstack([cv2.Rodrigues(np.asarray(rvec, dtype=np.float64))[0],
+                      np.asarray(t, dtype=np.float64).reshape(3, 1)])
+
+
+class TestStructureFromMotion:
+    """Test suite for SfM pose estimation and triangulation on a synthetic scene."""
+
+    @pytest.fixture
+    def generator(self, ar_tours):
+        """Create a 3D model generator."""
+        return ar_tours.ThreeDModelGenerator()
+
+    @pytest.fixture
+    def scene(self, generator):
+        """Three cameras viewing 200 points, with exact keypoints and matches."""
+        rng = np.random.default_rng(0)
+        images = [np.zeros((480, 640, 3), dtype=np.uint8)] * 3
+        K = generator._camera_matrix(images[0])
+        points = np.column_stack([rng.uniform(-1.2, 2, 200), rng.uniform(-1.5, 1.5, 200),
+                                  rng.uniform(5, 9, 200)])
+        poses = [
+            _pose([0, 0, 0], [0, 0, 0]),
+            _pose([0.02, 0.1, 0.01], [-1.0, 0.05, 0.1]),
+            _pose([0.03, 0.2, 0.02], [-2.0, 0.1, 0.4]),
+        ]
+
+        keypoints = []
+        for pose in poses:
+            pixels = (K @ (points @ pose[:, :3].T + pose[:, 3]).T).T
+            pixels = pixels[:, :2] / pixels[:, 2:]
+            keypoints.append([cv2.KeyPoint(float(x), float(y), 1.0) for x, y in pixels])
+        matches = [[cv2.DMatch(i, i, 0.0) for i in range(len(points))] for _ in range(2)]
+        return images, keypoints, matches, points, poses
+
+    def test_camera_poses(self, generator, scene):
+        """Chained essential-matrix poses recover rotations and translation directions."""
+        images, keypoints, matches, _, true_poses = scene
+
+        poses, inliers = generator._estimate_camera_poses(images, keypoints, matches)
+
+        assert len(poses) == 3
+        assert all(mask.all() for mask in inliers)
+        np.testing.assert_allclose(poses[0], true_poses[0])
+        for pose, true_pose in zip(poses[1:], true_poses[1:]):
+            np.testing.assert_allclose(pose[:, :3], true_pose[:, :3], atol=1e-3)
+        # The first pair's translation is recovered up to scale
+        direction = true_poses[1][:, 3] / np.linalg.norm(true_poses[1][:, 3])
+        np.testing.assert_allclose(poses[1][:, 3], direction, atol=1e-3)
+
+    def test_too_few_matches_keep_previous_pose(self, generator, scene):
+        """A pair with fewer than five matches repeats the previous pose."""
+        images, keypoints, matches, _, _ = scene
+        matches = [matches[0], matches[1][:4]]
+
+        poses, inliers = generator._estimate_camera_poses(images, keypoints, matches)
+
+        np.testing.assert_array_equal(poses[2], poses[1])
+        assert inliers[1] is None
+
+    def test_outlier_matches_are_not_triangulated(self, generator, scene):
+        """RANSAC outliers among the matches never reach triangulation."""
+        images, keypoints, matches, _, _ = scene
+        # Re-point 15% of the first pair's matches at the wrong keypoints
+        bad = np.arange(0, 200, 7)[:30]
+        pair = list(matches[0])
+        for i, j in zip(bad, np.roll(bad, 1)):
+            pair[i] = cv2.DMatch(int(i), int(j), 0.0)
+
+        poses, inliers = generator._estimate_camera_poses(images, keypoints, [pair])
+        points, (cam_idx, _, pixels) = generator._triangulate_points(
+            images, keypoints, [pair], poses, inliers
+        )
+
+        assert not inliers[0][bad].any()
+        assert len(points) == 200 - len(bad)
+        # Every kept observation pair projects from one true scene point
+        good = np.setdiff1d(np.arange(200), bad)
+        np.testing.assert_allclose(pixels[cam_idx == 0], cv2.KeyPoint_convert(keypoints[0])[good])
+        np.testing.assert_allclose(pixels[cam_idx == 1], cv2.KeyPoint_convert(keypoints[1])[good])
+
+    def test_triangulation_skips_pairs_without_pose(self, generator, scene):
+        """A pair whose pose fell back to the previous camera has no baseline."""
+        images, keypoints, matches, _, true_poses = scene
+
+        points, (cam_idx, _, _) = generator._triangulate_points(
+            images, keypoints, matches[:1], [true_poses[0], true_poses[0]], [None]
+        )
+
+        assert points.shape == (0, 3)
+        assert len(cam_idx) == 0
+
+    def test_triangulation(self, generator, scene):
+        """Triangulated points match the scene (up to scale) with two observations each."""
+        images, keypoints, matches, true_points, true_poses = scene
+        scale = np.linalg.norm(true_poses[1][:, 3])
+        poses = [true_poses[0], true_poses[1] / [[1, 1, 1, scale]]]
+
+        points, (cam_idx, point_idx, pixels) = generator._triangulate_points(
+            images, keypoints, matches[:1], poses, [np.ones(200, dtype=bool)]
+        )
+
+        np.testing.assert_allclose(points * scale, true_points, rtol=1e-3)
+        assert len(cam_idx) == len(point_idx) == len(pixels) == 2 * len(points)
+        np.testing.assert_array_equal(np.bincount(point_idx), np.full(len(points), 2))
+        np.testing.assert_array_equal(np.unique(cam_idx), [0, 1])
+        # Observations are the matched keypoints of each camera
+        np.testing.assert_allclose(pixels[cam_idx == 1], cv2.KeyPoint_convert(keypoints[1]))
+
+    def test_triangulation_drops_points_behind_cameras(self, generator, scene):
+        """Points that land behind either camera are discarded."""
+        images, keypoints, matches, _, true_poses = scene
+        # Flipping the second camera puts every point behind it
+        flipped = true_poses[1].copy()
+        flipped[:, :3] = -flipped[:, :3]
+
+        points, (cam_idx, point_idx, pixels) = generator._triangulate_points(
+            images, keypoints, matches[:1], [true_poses[0], flipped], [np.ones(200, dtype=bool)]
+        )
+
+        assert points.shape == (0, 3)
+        assert len(cam_idx) == len(point_idx) == len(pixels) == 0
+
+    def test_bundle_adjustment_ignores_bad_observations(self, generator, scene):
+        """Refinement fits the clean pixels despite a few grossly wrong ones."""
+        images, _, _, true_points, true_poses = scene
+        K = generator._camera_matrix(images[0])
+        rng = np.random.default_rng(1)
+
+        def project(points, poses, cam_idx, point_idx):
+            homogeneous = np.column_stack([points[point_idx], np.ones(len(point_idx))])
+            projected = np.einsum("nij,nj->ni", np.stack(poses)[cam_idx], homogeneous) @ K.T
+            return projected[:, :2] / projected[:, 2:]
+
+        # Every camera observes every point with 0.3 px noise; 10% are 30 px off
+        cam_idx = np.repeat(np.arange(3), len(true_points))
+        point_idx = np.tile(np.arange(len(true_points)), 3)
+        pixels = project(true_points, true_poses, cam_idx, point_idx)
+        pixels += rng.normal(scale=0.3, size=pixels.shape)
+        bad = rng.choice(len(pixels), len(pixels) // 10, replace=False)
+        pixels[bad] += 30.0
+        clean = np.setdiff1d(np.arange(len(pixels)), bad)
+
+        start_points = true_points * (1 + rng.normal(scale=0.01, size=true_points.shape))
+        start_poses = [true_poses[0], true_poses[1], _pose([0.035, 0.21, 0.02], [-1.97, 0.12, 0.38])]
+        points, poses = generator._bundle_adjust(
+            start_points, start_poses, (cam_idx, point_idx, pixels), K
+        )
+
+        def clean_error(points, poses):
+            residuals = project(points, poses, cam_idx, point_idx) - pixels
+            return np.median(np.linalg.norm(residuals[clean], axis=1))
+
+        assert clean_error(start_points, start_poses) > 2
+        assert clean_error(points, poses) < 0.5
+        np.testing.assert_allclose(poses[2][:, :3], true_poses[2][:, :3], atol=5e-3)
+
+    @pytest.mark.asyncio
+    async def test_bundle_adjustment_runs_off_the_event_loop(self, generator, monkeypatch):
+        """The solve runs in a worker thread, not on the loop's thread."""
+        threads = []
+
+        def bundle_adjust(points_3d, poses, observations, K):
+            threads.append(threading.get_ident())
+            return points_3d, poses
+
+        async def extract_features(images):
+            return [[], []], [None, None]
+
+        monkeypatch.setattr(generator, "_extract_features", extract_features)
+        monkeypatch.setattr(generator, "_bundle_adjust", bundle_adjust)
+        images = [np.zeros((48, 64, 3), dtype=np.uint8)] * 2
+
+        await generator._sfm_reconstruction(images)
+
+        assert threads and threads[0] != threading.get_ident()
@@ -0,0 +1,194 @@
+"""
+Test Suite for Predictive Maintenance
+
+Covers batched failure prediction across a portfolio with stub models and
+the priority buckets at their exact probability thresholds.
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+NOW = datetime(2024, 6, 1)
+
+
+class StubScaler:
+    """Identity scaler."""
+
+    def transform(self, X):
+        return np.asarray(X)
+
+
+class StubModel:
+    """Failure model returning a fixed probability per row, recording every call."""
+
+    def __init__(self, probability):
+        self.probability = probability
+        self.calls = []
+
+    def predict_proba(self, X):
+        self.calls.append(np.asarray(X))
+        p = np.full(len(X), self.probability)
+        return np.column_stack([1 - p, p])
+
+
+def _equipment(pm, equipment_id, equipment_type):
+    return pm.Equipment(
+        equipment_id=equipment_id,
+        property_id="prop-1",
+        equipment_type=equipment_type,
+        brand="Acme",
+        model="X1",
+        install_date=NOW - timedelta(days=365 * 12),
+        last_maintenance=None,
+        warranty_expiry=None,
+        expected_lifespan=10
+    )
+
+
+@pytest.fixture
+def service(predictive_maintenance):
+    """Create a service with no trained models deployed."""
+    service = predictive_maintenance.PredictiveMaintenanceService()
+    service.models, service.scalers = {}, {}
+    return service
+
+
+def _deploy(service, type_value, probability):
+    model = StubModel(probability)
+    service.models[type_value] = model
+    service.scalers[type_value] = StubScaler()
+    return model
+
+
+class TestPredictFailuresBatch:
+    """Test suite for portfolio-wide failure prediction."""
+
+    @pytest.mark.asyncio
+    async def test_one_model_call_per_type(self, predictive_maintenance, service):
+        """Equipment is grouped by type and each model scores its group in one call."""
+        pm = predictive_maintenance
+        hvac = _deploy(service, "hvac", 0.6)
+        plumbing = _deploy(service, "plumbing", 0.8)
+        equipment = [
+            _equipment(pm, "e0", pm.EquipmentType.HVAC),
+            _equipment(pm, "e1", pm.EquipmentType.PLUMBING),
+            _equipment(pm, "e2", pm.EquipmentType.HVAC),
+        ]
+
+        tasks = await service.predict_failures_batch(equipment, {}, NOW)
+
+        assert [call.shape for call in hvac.calls] == [(2, 9)]
+        assert [call.shape for call in plumbing.calls] == [(1, 9)]
+        assert [task.equipment_id for task in tasks] == ["e0", "e1", "e2"]
+        assert [task.failure_probability for task in tasks] == [0.6, 0.8, 0.6]
+
+    @pytest.mark.asyncio
+    async def test_type_without_model_is_skipped(self, predictive_maintenance, service):
+        """Equipment whose type has no trained model gets no task."""
+        pm = predictive_maintenance
+        _deploy(service, "hvac", 0.9)
+        equipment = [
+            _equipment(pm, "roof", pm.EquipmentType.ROOF),
+            _equipment(pm, "hvac", pm.EquipmentType.HVAC),
+        ]
+
+        tasks = await service.predict_failures_batch(equipment, {}, NOW)
+
+        assert [task.equipment_id for task in tasks] == ["hvac"]
+
+    @pytest.mark.asyncio
+    async def test_readings_are_matched_by_equipment_id(self, predictive_maintenance, service):
+        """Each unit's features and parts come from its own sensor readings."""
+        pm = predictive_maintenance
+        hvac = _deploy(service, "hvac", 0.9)
+        equipment = [
+            _equipment(pm, "quiet", pm.EquipmentType.HVAC),
+            _equipment(pm, "hot", pm.EquipmentType.HVAC),
+        ]
+        readings = {
+            "hot": [pm.IoTReading(
+                sensor_id="s1", equipment_id="hot", timestamp=NOW,
+                readings={"temperature": 95.0, "vibration": 1.0}, alerts=["overheat"]
+            )]
+        }
+
+        tasks = await service.predict_failures_batch(equipment, readings, NOW)
+
+        features = hvac.calls[0]
+        # avg_temperature, anomaly_count and sensor count columns
+        np.testing.assert_array_equal(features[:, [2, 5, 8]], [[0, 0, 0], [95, 1, 1]])
+        quiet, hot = tasks
+        assert "Thermal overload protector" not in quiet.required_parts
+        assert "Thermal overload protector" in hot.required_parts
+
+    @pytest.mark.asyncio
+    async def test_matches_single_prediction(self, predictive_maintenance, service):
+        """predict_failures is the one-unit case of the batch."""
+        pm = predictive_maintenance
+        _deploy(service, "electrical", 0.55)
+        unit = _equipment(pm, "e0", pm.EquipmentType.ELECTRICAL)
+
+        single = await service.predict_failures(unit, [], NOW)
+        batch = await service.predict_failures_batch([unit], {}, NOW)
+
+        strip = lambda task: task.model_dump(exclude={"task_id"})  # noqa: E731
+        assert [strip(task) for task in single] == [strip(task) for task in batch]
+
+
+class TestPriorityBuckets:
+    """Test suite for the failure probability to priority mapping."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("probability, priority, days_ahead", [
+        (0.2, None, None),
+        (0.3, None, None),
+        (0.31, "medium", 14),
+        (0.5, "medium", 14),
+        (0.51, "high", 7),
+        (0.7, "high", 7),
+        (0.71, "critical", 3),
+        (0.95, "critical", 3),
+    ])
+    async def test_thresholds_are_exclusive(self, predictive_maintenance, service,
+                                            probability, priority, days_ahead):
+        """A probability exactly on a threshold stays in the lower bucket."""
+        pm = predictive_maintenance
+        _deploy(service, "hvac", probability)
+        unit = _equipment(pm, "e0", pm.EquipmentType.HVAC)
+
+        tasks = await service.predict_failures_batch([unit], {}, NOW)
+
+        if priority is None:
+            assert tasks == []
+            return
+        (task,) = tasks
+        assert task.priority == priority
+        assert task.recommended_date == NOW + timedelta(days=days_ahead)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("probability", [0.31, 0.5, 0.51, 0.7, 0.71, 0.95])
+    async def test_task_without_bucket_derives_it(self, predictive_maintenance, service,
+                                                  probability):
+        """_create_maintenance_task picks the same bucket when none is passed."""
+        pm = predictive_maintenance
+        _deploy(service, "hvac", probability)
+        unit = _equipment(pm, "e0", pm.EquipmentType.HVAC)
+
+        (batched,) = await service.predict_failures_batch([unit], {}, NOW)
+        direct = await service._create_maintenance_task(unit, probability, [], NOW)
+
+        assert direct.priority == batched.priority
+        assert direct.recommended_date == batched.recommended_date
+
+    @pytest.mark.asyncio
+    async def test_low_priority_at_threshold(self, predictive_maintenance, service):
+        """A direct task at exactly 0.3 is low priority, a month out."""
+        pm = predictive_maintenance
+        unit = _equipment(pm, "e0", pm.EquipmentType.HVAC)
+
+        task = await service._create_maintenance_task(unit, 0.3, [], NOW)
+
+        assert task.priority == pm.MaintenancePriority.LOW
+        assert task.recommended_date == NOW + timedelta(days=30)